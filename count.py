@@ -16,18 +16,21 @@ con = psycopg2.connect(
 
 cur = con.cursor()
 
-c = cur.execute("""SELECT id, first_name, middle_name, last_name FROM swimmers WHERE id not in (1, 2, 3)""")
+# Swims are the entry_count and relay_count counters kept on swimmers by
+# migrations/0005_counters.sql, less the 'RL' entries: those are the leadoff legs the
+# importers split out of relays, which relay_count already counts once. Ignored
+# entries are not counted.
+c = cur.execute("""SELECT s.id, s.first_name, s.middle_name, s.last_name, s.entry_count + s.relay_count - coalesce(rl.swims, 0)
+FROM swimmers s
+LEFT JOIN (SELECT swimmer, count(*) AS swims FROM entries WHERE seed = 'RL' AND ignored = false GROUP BY swimmer) rl ON rl.swimmer = s.id
+WHERE s.id not in (1, 2, 3)""")
 swimmers = cur.fetchall()
 
 count = []
 
 for swimmer in swimmers:
-    s = cur.execute(f"SELECT count(*) FROM entries WHERE swimmer = {swimmer[0]} AND seed != 'RL'")
-    l = cur.fetchall()
-    r = cur.execute(f"SELECT count(*) FROM relays WHERE {swimmer[0]} in (swimmer_1, swimmer_2, swimmer_3, swimmer_4)")
-    j = cur.fetchall()
     name = f"{swimmer[3]}, {swimmer[1]} {swimmer[2]}".strip()
-    count.append([l[0][0] + j[0][0], name])
+    count.append([swimmer[4], name])
 
 count.sort(key=lambda x: x[0], reverse=True)
 
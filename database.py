@@ -0,0 +1,29 @@
+import json
+
+import psycopg2
+
+
+def connect(path: str = "creds.json"):
+    """psycopg2 connection to the database configured in creds.json."""
+    with open(path, "r") as f:
+        creds = json.load(f)
+    return psycopg2.connect(
+        user=creds["database"]["username"],
+        password=creds["database"]["password"],
+        database=creds["database"]["database"],
+        host=creds["database"]["host"],
+        port="5432",
+    )
+
+
+def call(function: str):
+    """Runs SELECT function() in its own transaction and returns the result."""
+    con = connect()
+    try:
+        cur = con.cursor()
+        cur.execute(f"SELECT {function}()")
+        result = cur.fetchone()[0]
+        con.commit()
+    finally:
+        con.close()
+    return result
@@ -1,7 +1,6 @@
 import psycopg2
 import json
 import pdfkit
-import re
 from datetime import datetime
 
 date = datetime.now()
@@ -21,15 +20,6 @@ con = psycopg2.connect(
 cur = con.cursor()
 
 
-def sort_by_time(s):
-    t = s[5]
-    x = re.search("[0-9]+:[0-9]+\.[0-9]+", str(t))
-    if not x:
-        return "0:" + t
-    else:
-        return t
-
-
 cur.execute("SELECT * FROM swimmers WHERE active = true AND manager = false ORDER BY last_name, first_name")
 swimmers = cur.fetchall()
 
@@ -48,12 +38,10 @@ for swimmer in swimmers:
     num1 = 0
     out1 += f"{swimmer[3]}, {swimmer[1]} {swimmer[2]}\n"
     for event in events:
-        cur.execute(f"SELECT * FROM entries WHERE swimmer = {swimmer[0]} AND event = '{event[0]}' AND ignored = false")
-        entries = cur.fetchall()
-        if not entries:
+        cur.execute(f"SELECT * FROM entries WHERE swimmer = {swimmer[0]} AND event = '{event[0]}' AND ignored = false ORDER BY time_cs NULLS LAST, id LIMIT 1")
+        entry = cur.fetchone()
+        if not entry:
             continue
-        entries.sort(key=sort_by_time)
-        entry = entries[0]
         if entry[2] == MEET[0]:
             out1 += f"{event[0]} - {entry[5]}\n"
             num += 1
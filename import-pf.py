@@ -415,7 +415,7 @@ if "--import" in sys.argv:
                 continue
         pprint.pprint(f"{result['name']} - {id}")
         pprint.pprint(result)
-        splits = json.dumps(result["splits"])
+        splits = list(result["splits"] or [])
         if result['swimmers']:
             relay = True
         else:
@@ -475,7 +475,7 @@ if "--import" in sys.argv:
                 cur.execute(f"UPDATE swimmers SET dob = '{result['dob']}' WHERE id = {id}")
         pprint.pprint(f"{result['name']} - {id}")
         pprint.pprint(result)
-        splits = json.dumps(result["splits"])
+        splits = list(result["splits"] or [])
         if result['swimmers']:
             relay = True
         else:
@@ -1,7 +1,6 @@
 import asyncio
 import datetime
 import json
-import calendar
 import random
 import os
 import base64
@@ -9,9 +8,11 @@ import secrets
 import smtplib
 import ssl
 import argparse
+import hashlib
 import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from email.utils import format_datetime, parsedate_to_datetime
 from passlib.hash import argon2
 from typing import AsyncIterator, Awaitable, Callable
 from tabulate import tabulate
@@ -20,6 +21,8 @@ import asyncpg
 from aiohttp import web
 import aiohttp_cors
 
+from migrate import expected_indexes
+
 router = web.RouteTableDef()
 
 venues = {
@@ -107,36 +110,268 @@ def welcome_email(email, name):
         server.sendmail(creds["email"]["sender_email"], email, message.as_string())
 
 
-def create_date(start, end=None):
-    try:
-        if end is None:
-            d = datetime.datetime.strptime(start, "%Y%m%d")
-            return f"{d.day} {calendar.month_name[d.month]} {d.year}"
-        if end:
-            s = datetime.datetime.strptime(start, "%Y%m%d")
-            e = datetime.datetime.strptime(end, "%Y%m%d")
-            if s.month == e.month:
-                return f"{s.day}-{e.day} {calendar.month_name[e.month]} {s.year}"
-            else:
-                return f"{s.day} {calendar.month_name[s.month]} - {e.day} {calendar.month_name[e.month]} {s.year}"
-    except Exception as e:
-        return f"Unknown"
-
-
-def top5Sort(e):
-    if len(e["time"]) <= 5:
-        adjusted_t = f"0:{e['time']}"
-        return adjusted_t
-    else:
-        return e["time"]
-
-
-def sortByTime(e):
-    if len(e["time"]) <= 5:
-        adjusted_t = f"0:{e['time']}"
-        return adjusted_t
-    else:
-        return e["time"]
+# Best swim per swimmer (or per relay lineup) for an event, fastest first.
+# $1: event code, $2: exclude homeschool swimmers, $3: number of rows (at most TOP_N_MAX)
+TOP_N_MAX = 100
+TOP_N_QUERY = """
+WITH candidates AS (
+    SELECT e.id, e.swimmer, e.meet, e.seed, e.time, e.time_cs, e.splits, e.standards,
+           e.relay, s.first_name, s.last_name, s.homeschool,
+           CASE WHEN r.entry IS NULL THEN 'S' || e.swimmer
+                ELSE concat_ws('-', 'R', r.swimmer_1, r.swimmer_2, r.swimmer_3, r.swimmer_4)
+           END AS competitor
+    FROM entries e
+    JOIN swimmers s ON s.id = e.swimmer
+    LEFT JOIN relays r ON e.relay AND r.entry = e.id
+    WHERE e.event = $1
+      AND e.ignored = false
+      AND NOT ($2 AND s.homeschool IS TRUE)
+      AND e.has_valid_splits
+)
+SELECT * FROM (
+    SELECT *, row_number() OVER (PARTITION BY competitor ORDER BY time_cs, id) AS pick
+    FROM candidates
+    WHERE time_cs IS NOT NULL
+) best
+WHERE pick = 1
+ORDER BY time_cs, id
+LIMIT $3
+"""
+
+# The same rows as TOP_N_QUERY, read from the leaderboards table, which holds the top
+# five per event (see migrations/0004_leaderboards.sql).
+# $1: event code, $2: 'official' or 'program', $3: number of rows
+LEADERBOARD_SIZE = 5
+LEADERBOARD_QUERY = """
+SELECT e.id, e.swimmer, e.meet, e.seed, e.time, e.splits, e.standards, e.relay,
+       s.first_name, s.last_name, s.homeschool
+FROM leaderboards l
+JOIN entries e ON e.id = l.entry
+JOIN swimmers s ON s.id = e.swimmer
+WHERE l.event = $1 AND l.scope = $2
+ORDER BY l.rank
+LIMIT $3
+"""
+
+
+EVENT_COLUMNS = (
+    "ev.code AS event_code, ev.name AS event_name, ev.distance AS event_distance, "
+    "ev.stroke AS event_stroke, ev.relay AS event_relay, ev.gender AS event_gender"
+)
+
+STANDARD_COLUMNS = (
+    "st.code AS standard_code, st.name AS standard_name, "
+    "st.authority AS standard_authority, st.min_time AS standard_min_time, "
+    "st.year AS standard_year, st.event AS standard_event, "
+    "st.gender AS standard_gender, st.short_name AS standard_short_name, "
+    "st.course AS standard_course"
+)
+
+# The relay legs of entry e as a JSON object of lite swimmers keyed by leg number.
+# A leg whose swimmer does not exist is null; legs with no swimmer are left out.
+RELAY_LINEUP_JOIN = """
+LEFT JOIN LATERAL (
+    SELECT count(*) AS legs, json_object_agg(leg.leg, CASE WHEN rs.id IS NOT NULL THEN
+        json_build_object(
+            'id', rs.id::text,
+            'first_name', rs.first_name,
+            'middle_name', rs.middle_name,
+            'last_name', rs.last_name,
+            'age', rs.age,
+            'gender', rs.gender,
+            'class', rs.class,
+            'active', rs.active,
+            'homeschool', rs.homeschool,
+            'usas_id', rs.usas_id,
+            'dob', rs.dob,
+            'manager', rs.manager,
+            'stats', json_build_object(
+                'entries', rs.entry_count
+            )
+        ) END
+    ) AS swimmers
+    FROM relay_legs leg
+    LEFT JOIN swimmers rs ON rs.id = leg.swimmer
+    WHERE leg.entry = e.id
+) lineup ON e.relay
+"""
+
+# Every entry of a meet with its swimmer, event, standard and relay lineup, grouped by
+# event in the order the events were entered and fastest first within each event.
+# $1: meet id
+MEET_RESULTS_QUERY = f"""
+SELECT e.*, s.first_name, s.middle_name, s.last_name, s.homeschool,
+       {EVENT_COLUMNS}, {STANDARD_COLUMNS},
+       lineup.legs, lineup.swimmers AS lineup
+FROM (
+    SELECT *, row_number() OVER () AS seen FROM entries WHERE meet = $1
+) e
+JOIN swimmers s ON s.id = e.swimmer
+JOIN events ev ON ev.code = e.event
+LEFT JOIN standards st ON st.code = e.standards
+{RELAY_LINEUP_JOIN}
+ORDER BY min(e.seen) OVER (PARTITION BY e.event),
+         e.time_cs NULLS LAST,
+         e.seen
+"""
+
+# Non-ignored entries of one team at a meet, by event code and fastest first.
+# $1: meet id, $2: team code
+TEAM_RESULTS_QUERY = f"""
+SELECT e.*, s.first_name, s.middle_name, s.last_name, s.homeschool,
+       {EVENT_COLUMNS}, {STANDARD_COLUMNS},
+       lineup.legs, lineup.swimmers AS lineup
+FROM entries e
+JOIN swimmers s ON s.id = e.swimmer
+JOIN events ev ON ev.code = e.event
+LEFT JOIN standards st ON st.code = e.standards
+{RELAY_LINEUP_JOIN}
+WHERE e.meet = $1 AND s.team = $2 AND e.ignored = false
+ORDER BY e.event COLLATE "C",
+         e.time_cs NULLS LAST,
+         s.last_name, s.first_name, s.middle_name
+"""
+
+TEAM_COLUMNS = (
+    "t.code AS team_code, t.name AS team_name, t.address AS team_address, "
+    "t.head_coach AS team_head_coach, t.email AS team_email, t.phone AS team_phone, "
+    "t.verification_code AS team_verification_code"
+)
+
+# Swimmers with their team and the meets they swam in. Entry, relay and meet counts
+# are columns on swimmers maintained by migrations/0005_counters.sql.
+# $1: array of swimmer ids
+SWIMMERS_QUERY = f"""
+SELECT s.*, {TEAM_COLUMNS}, individual.meets
+FROM swimmers s
+LEFT JOIN teams t ON t.code = s.team
+CROSS JOIN LATERAL (
+    SELECT coalesce(array_agg(DISTINCT meet), '{{}}') AS meets
+    FROM entries
+    WHERE swimmer = s.id AND ignored = false
+) individual
+WHERE s.id = ANY($1::bigint[])
+"""
+
+# Fastest non-ignored swim in every event a swimmer has swum.
+# $1: swimmer id
+BEST_TIMES_QUERY = f"""
+SELECT DISTINCT ON (e.event) e.*, {STANDARD_COLUMNS}
+FROM entries e
+LEFT JOIN standards st ON st.code = e.standards
+WHERE e.swimmer = $1 AND e.ignored = false
+ORDER BY e.event, e.time_cs NULLS LAST, e.id
+"""
+
+
+def prefixed_columns(alias: str, columns: list, prefix: str) -> str:
+    return ", ".join(f"{alias}.{column} AS {prefix}{column}" for column in columns)
+
+
+# Every meet field meet_from_row reads, shared by all meet queries.
+MEET_FIELDS = [
+    "id",
+    "name",
+    "venue",
+    "designator",
+    "startdate",
+    "enddate",
+    "season",
+    "host",
+    "notes",
+    "concluded",
+    "format",
+    "pwarmups",
+    "fwarmups",
+    "pstart",
+    "fstart",
+    "infopath",
+    "heatspath",
+    "sessionpath",
+    "resultspath",
+    "scorespath",
+    "psychpath",
+    "last_updated",
+    "officialname",
+    "display_date",
+]
+
+MEET_COLUMNS = prefixed_columns("m", MEET_FIELDS, "meet_")
+
+# A swimmer's whole history with meet, event and standard, grouped by event in the
+# order the events were first swum and fastest first within each event.
+# $1: swimmer id
+SWIMMER_HISTORY_QUERY = f"""
+SELECT e.*, s.first_name, s.middle_name, s.last_name, s.homeschool,
+       {EVENT_COLUMNS}, {STANDARD_COLUMNS}, {MEET_COLUMNS}
+FROM (
+    SELECT *, row_number() OVER () AS seen FROM entries WHERE swimmer = $1
+) e
+JOIN swimmers s ON s.id = e.swimmer
+JOIN events ev ON ev.code = e.event
+JOIN meets m ON m.id = e.meet
+LEFT JOIN standards st ON st.code = e.standards
+ORDER BY min(e.seen) OVER (PARTITION BY e.event),
+         e.time_cs NULLS LAST,
+         e.seen
+"""
+
+SWIMMER_LITE_COLUMNS = [
+    "id",
+    "first_name",
+    "middle_name",
+    "last_name",
+    "age",
+    "gender",
+    "class",
+    "active",
+    "homeschool",
+    "usas_id",
+    "dob",
+    "manager",
+    "entry_count",
+]
+
+USER_COLUMNS = [
+    "id",
+    "username",
+    "name",
+    "email",
+    "permissions",
+    "active",
+    "linked_swimmer",
+    "latest_access",
+]
+
+
+def swimmer_lite_columns(alias: str, prefix: str) -> str:
+    return prefixed_columns(alias, SWIMMER_LITE_COLUMNS, prefix)
+
+
+# Users with their linked swimmer.
+USERS_QUERY = f"""
+SELECT {prefixed_columns("u", USER_COLUMNS, "")}, {swimmer_lite_columns("ls", "ls_")}
+FROM users u
+LEFT JOIN swimmers ls ON ls.id = u.linked_swimmer
+"""
+
+# Linking requests with the requested swimmer.
+LINKING_REQUESTS_QUERY = f"""
+SELECT lr.*, {swimmer_lite_columns("rs", "rs_")}
+FROM linking_requests lr
+LEFT JOIN swimmers rs ON rs.id = lr.swimmer_id
+"""
+
+# Linking requests with the requested swimmer and the requesting user, along with
+# the swimmer that user is already linked to.
+LINKING_QUEUE_QUERY = f"""
+SELECT lr.*, {prefixed_columns("u", USER_COLUMNS, "u_")},
+       {swimmer_lite_columns("ls", "ls_")}, {swimmer_lite_columns("rs", "rs_")}
+FROM linking_requests lr
+JOIN users u ON u.id = lr.user_id
+LEFT JOIN swimmers ls ON ls.id = u.linked_swimmer
+LEFT JOIN swimmers rs ON rs.id = lr.swimmer_id
+"""
 
 
 async def get_event_name(db, e):
@@ -191,14 +426,139 @@ def generate_id(id_type: int, year: int = 0, join_date: int = None) -> int:
     )
 
 
-async def fetch_standard(db: asyncpg.Connection, code):
-    if type(code) == dict:
-        code = code["code"]
-    if code is None:
-        return None
-    row = await db.fetchrow("SELECT * FROM standards WHERE code = $1", str(code))
-    if not row:
-        raise NotFoundException(f"Standard {code} does not exist!")
+class CacheStats:
+    """
+    Hit and miss counters for the in-process caches, reported by /cache/stats along
+    with each cache's own counts(). Whatever the caches and the request loaders
+    return is shared between callers, so treat it as read-only.
+    """
+
+    hits = 0
+    misses = 0
+
+    def counts(self) -> dict:
+        return {}
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, **self.counts()}
+
+
+class Loader:
+    """
+    Batches and memoizes lookups of one kind of record for the lifetime of a request.
+    Every key asked for during the same pass of the event loop is resolved by a single
+    call to batch_fn, which takes a list of keys and returns a dict of the ones it
+    found. Callers get a shielded view of the shared future, so one cancelled caller
+    does not cancel the lookup for the others.
+    """
+
+    def __init__(self, batch_fn, key=int, name="Record"):
+        self.batch_fn = batch_fn
+        self.key = key
+        self.name = name
+        self.futures = {}
+        self.queue = []
+        self.tasks = set()
+
+    def load(self, key) -> asyncio.Future:
+        key = self.key(key)
+        if key not in self.futures:
+            loop = asyncio.get_running_loop()
+            self.futures[key] = loop.create_future()
+            if not self.queue:
+                loop.call_soon(self.schedule)
+            self.queue.append(key)
+        return asyncio.shield(self.futures[key])
+
+    async def load_many(self, keys) -> list:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def schedule(self):
+        task = asyncio.ensure_future(self.dispatch())
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def dispatch(self):
+        keys, self.queue = self.queue, []
+        try:
+            found = await self.batch_fn(keys)
+        except (Exception, NotFoundException) as ex:
+            for key in keys:
+                future = self.futures.pop(key)
+                if not future.done():
+                    future.set_exception(ex)
+        else:
+            for key in keys:
+                future = self.futures[key]
+                if future.done():
+                    continue
+                if key in found:
+                    future.set_result(found[key])
+                else:
+                    future.set_exception(
+                        NotFoundException(f"{self.name} {key} does not exist!")
+                    )
+        finally:
+            # If the batch was cancelled, fail its waiters instead of leaving them
+            # pending, and let a later load try again.
+            for key in keys:
+                future = self.futures.get(key)
+                if future is None:
+                    continue
+                if not future.done():
+                    future.cancel()
+                if future.cancelled():
+                    del self.futures[key]
+
+
+class Loaders:
+    """
+    The set of loaders for one request, attached as request["loaders"] by
+    loaders_middleware.
+    """
+
+    def __init__(self, db: asyncpg.Pool):
+        self.db = db
+        self.swimmers = Loader(lambda ids: fetch_swimmers(db, ids), int, "Swimmer")
+        self.swimmers_lite = Loader(
+            lambda ids: fetch_swimmers_lite(db, ids), int, "Swimmer"
+        )
+        self.meets = Loader(lambda ids: fetch_meets(db, ids), int, "Meet")
+        self.events = Loader(lambda codes: fetch_events(db, codes), str, "Event")
+        self.standards = Loader(
+            lambda codes: fetch_standards(db, codes), str, "Standard"
+        )
+        self.relays = Loader(lambda ids: fetch_relays(db, ids), int, "Relay")
+
+    async def standard(self, code):
+        if code is None:
+            return None
+        return await self.standards.load(code)
+
+    async def relay(self, entry: int):
+        try:
+            lineup = await self.relays.load(entry)
+        except NotFoundException:
+            return None
+        swimmers = await asyncio.gather(*(self.relay_leg(id) for id in lineup))
+        return {str(leg): swimmer for leg, swimmer in enumerate(swimmers, 1)}
+
+    async def relay_leg(self, id):
+        if id is None:
+            return None
+        try:
+            return await self.swimmers_lite.load(id)
+        except NotFoundException:
+            return None
+
+
+@web.middleware
+async def loaders_middleware(request: web.Request, handler) -> web.Response:
+    request["loaders"] = Loaders(request.config_dict["DB"])
+    return await handler(request)
+
+
+def standard_from_row(row) -> dict:
     return {
         "code": row["code"],
         "name": row["name"],
@@ -212,35 +572,114 @@ async def fetch_standard(db: asyncpg.Connection, code):
     }
 
 
-async def fetch_entry(db: asyncpg.Connection, id: int):
-    row = await db.fetchrow("SELECT * FROM entries WHERE id = $1", int(id))
-    if not row:
-        raise NotFoundException(f"Entry {id} does not exist!")
-    resp = {
+async def fetch_standard(db: asyncpg.Connection, code):
+    if type(code) == dict:
+        code = code["code"]
+    if code is None:
+        return None
+    standards = await fetch_standards(db, [code])
+    if str(code) not in standards:
+        raise NotFoundException(f"Standard {code} does not exist!")
+    return standards[str(code)]
+
+
+async def fetch_standards(db: asyncpg.Connection, codes: list) -> dict:
+    return await reference_cache.get_many(db, "standards", codes)
+
+
+async def hydrate_entry(loaders: "Loaders", row) -> dict:
+    swimmer, meet, event, standard = await asyncio.gather(
+        loaders.swimmers.load(row["swimmer"]),
+        loaders.meets.load(row["meet"]),
+        loaders.events.load(row["event"]),
+        loaders.standard(row["standards"]),
+    )
+    return {
         "id": str(row["id"]),
-        "swimmer": await fetch_swimmer(db, row["swimmer"]),
-        "meet": await fetch_meet(db, row["meet"]),
-        "event": await fetch_event(db, row["event"]),
+        "swimmer": swimmer,
+        "meet": meet,
+        "event": event,
         "seed": row["seed"],
         "time": row["time"],
-        "splits": json.loads(row["splits"]),
-        "standards": await fetch_standard(db, row["standards"]),
-        "relay": None,
+        "splits": row["splits"],
+        "standards": standard,
+        "relay": await loaders.relay(row["id"]) if row["relay"] else None,
     }
-    if row["relay"]:
-        try:
-            swimmers = await db.fetchrow(
-                "SELECT * FROM relays WHERE entry = $1", int(id)
-            )
-            resp["relay"] = {
-                "1": await fetch_swimmer_lite(db, swimmers["swimmer_1"]),
-                "2": await fetch_swimmer_lite(db, swimmers["swimmer_2"]),
-                "3": await fetch_swimmer_lite(db, swimmers["swimmer_3"]),
-                "4": await fetch_swimmer_lite(db, swimmers["swimmer_4"]),
-            }
-        except:
-            pass
-    return resp
+
+
+async def hydrate_result(loaders: "Loaders", row, swimmer: dict) -> dict:
+    meet, event, standard = await asyncio.gather(
+        loaders.meets.load(row["meet"]),
+        loaders.events.load(row["event"]),
+        loaders.standard(row["standards"]),
+    )
+    return {
+        "swimmer": swimmer_results_name(swimmer),
+        "homeschool": swimmer["homeschool"],
+        "meet": meet,
+        "event": event,
+        "seed": row["seed"],
+        "time": row["time"],
+        "splits": row["splits"],
+        "standards": standard,
+    }
+
+
+def unprefix(row, prefix: str) -> dict:
+    return {
+        key[len(prefix) :]: value
+        for key, value in row.items()
+        if key.startswith(prefix)
+    }
+
+
+def standard_from_joined(row):
+    if row["standard_code"] is None:
+        return None
+    return standard_from_row(unprefix(row, "standard_"))
+
+
+def relay_lineup(legs: dict):
+    """
+    The API form of a relay: all four legs keyed "1" to "4", with None for a leg
+    that has no swimmer. A relay without any legs has no lineup.
+    """
+    if not legs:
+        return None
+    return {str(leg): legs.get(str(leg)) for leg in range(1, 5)}
+
+
+def relay_from_joined(row):
+    if not row["relay"] or not row["legs"]:
+        return None
+    return relay_lineup(json.loads(row["lineup"]))
+
+
+def group_results(rows, hydrate) -> list:
+    """
+    Groups joined entry rows, already ordered by event, into event objects with an
+    "entries" list built by hydrate(row, event). Events whose entries are all ignored
+    are left out.
+    """
+    events = {}
+    entries = {}
+    counted = set()
+    for row in rows:
+        code = row["event"]
+        if code not in events:
+            events[code] = event_from_row(unprefix(row, "event_"))
+            entries[code] = {**events[code], "entries": []}
+        if not row["ignored"]:
+            counted.add(code)
+        entries[code]["entries"].append(hydrate(row, events[code]))
+    return [entries[code] for code in entries if code in counted]
+
+
+async def fetch_entry(db: asyncpg.Connection, id: int, loaders: "Loaders" = None):
+    row = await db.fetchrow("SELECT * FROM entries WHERE id = $1", int(id))
+    if not row:
+        raise NotFoundException(f"Entry {id} does not exist!")
+    return await hydrate_entry(loaders or Loaders(db), row)
 
 
 async def fetch_entry_lite(db: asyncpg.Connection, id: int):
@@ -253,30 +692,16 @@ async def fetch_entry_lite(db: asyncpg.Connection, id: int):
         "event": await fetch_event(db, row["event"]),
         "seed": row["seed"],
         "time": row["time"],
-        "splits": json.loads(row["splits"]),
+        "splits": row["splits"],
         "standards": await fetch_standard(db, row["standards"]),
         "relay": None,
     }
     if row["relay"]:
-        try:
-            swimmers = await db.fetchrow(
-                "SELECT * FROM relays WHERE entry = $1", int(id)
-            )
-            resp["relay"] = {
-                "1": await fetch_swimmer_lite(db, swimmers["swimmer_1"]),
-                "2": await fetch_swimmer_lite(db, swimmers["swimmer_2"]),
-                "3": await fetch_swimmer_lite(db, swimmers["swimmer_3"]),
-                "4": await fetch_swimmer_lite(db, swimmers["swimmer_4"]),
-            }
-        except:
-            pass
+        resp["relay"] = await fetch_relay(db, id)
     return resp
 
 
-async def fetch_event(db: asyncpg.Connection, id: str):
-    row = await db.fetchrow("SELECT * FROM events WHERE code = $1", str(id))
-    if not row:
-        raise NotFoundException(f"Event {id} does not exist!")
+def event_from_row(row) -> dict:
     return {
         "code": row["code"],
         "name": row["name"],
@@ -287,268 +712,196 @@ async def fetch_event(db: asyncpg.Connection, id: str):
     }
 
 
-async def fetch_event_all_entries(db: asyncpg.Connection, id: str):
+async def fetch_event(db: asyncpg.Connection, id: str):
+    events = await fetch_events(db, [id])
+    if str(id) not in events:
+        raise NotFoundException(f"Event {id} does not exist!")
+    return events[str(id)]
+
+
+async def fetch_events(db: asyncpg.Connection, codes: list) -> dict:
+    return await reference_cache.get_many(db, "events", codes)
+
+
+async def fetch_event_all_entries(
+    db: asyncpg.Connection, id: str, loaders: "Loaders" = None
+):
     rows = await db.fetch("SELECT * FROM entries WHERE event = $1", str(id))
     if not rows:
         raise NotFoundException(f"Event {id} does not exist!")
-    entries = []
-    for entry in rows:
-        e = {
-            "id": str(entry["id"]),
-            "swimmer": await fetch_swimmer(db, entry["swimmer"]),
-            "meet": await fetch_meet(db, entry["meet"]),
-            "event": await fetch_event(db, entry["event"]),
-            "seed": entry["seed"],
-            "time": entry["time"],
-            "splits": json.loads(entry["splits"]),
-            "standards": await fetch_standard(db, entry["standards"]),
-            "relay": None,
+    loaders = loaders or Loaders(db)
+    return list(await asyncio.gather(*(hydrate_entry(loaders, row) for row in rows)))
+
+
+async def fetch_relay(db: asyncpg.Connection, entry: int):
+    rows = await db.fetch(
+        "SELECT l.leg, s.* FROM relay_legs l LEFT JOIN swimmers s ON s.id = l.swimmer "
+        "WHERE l.entry = $1",
+        int(entry),
+    )
+    return relay_lineup(
+        {
+            str(row["leg"]): (
+                swimmer_lite_from_row(row, row["entry_count"])
+                if row["id"] is not None
+                else None
+            )
+            for row in rows
         }
-        if entry["relay"]:
-            try:
-                swimmers = await db.fetchrow(
-                    "SELECT * FROM relays WHERE entry = $1", int(entry["id"])
-                )
-                e["relay"] = {
-                    "1": await fetch_swimmer_lite(db, swimmers["swimmer_1"]),
-                    "2": await fetch_swimmer_lite(db, swimmers["swimmer_2"]),
-                    "3": await fetch_swimmer_lite(db, swimmers["swimmer_3"]),
-                    "4": await fetch_swimmer_lite(db, swimmers["swimmer_4"]),
-                }
-            except:
-                pass
-        entries.append(e)
-    return entries
+    )
 
 
-async def fetch_event_top_five(db: asyncpg.Connection, id: str, official=True):
+async def fetch_relays(db: asyncpg.Connection, entries: list) -> dict:
+    """Swimmer ids of each relay's four legs, None where a leg has no swimmer."""
     rows = await db.fetch(
-        "SELECT * FROM entries WHERE event = $1 AND ignored = false", str(id)
+        "SELECT entry, leg, swimmer FROM relay_legs WHERE entry = ANY($1::bigint[])",
+        [int(entry) for entry in entries],
     )
+    lineups = {}
+    for row in rows:
+        lineups.setdefault(row["entry"], [None] * 4)[row["leg"] - 1] = row["swimmer"]
+    return lineups
+
+
+async def fetch_event_top_n(
+    db: asyncpg.Connection,
+    id: str,
+    n: int = 5,
+    official=True,
+    loaders: "Loaders" = None,
+):
+    if not 1 <= int(n) <= TOP_N_MAX:
+        raise ValueError(f"Cannot fetch top {n} of an event! (1-{TOP_N_MAX})")
+    if int(n) <= LEADERBOARD_SIZE:
+        scope = "official" if official else "program"
+        rows = await db.fetch(LEADERBOARD_QUERY, str(id), scope, int(n))
+    else:
+        rows = await db.fetch(TOP_N_QUERY, str(id), bool(official), int(n))
     if not rows:
-        raise NotFoundException(f"Event {id} does not exist!")
-    entries = []
-    for entry in rows:
-        try:
-            if json.loads(entry["splits"])[0] == 0.0:
-                continue
-        except IndexError:
-            pass
-        s = await fetch_swimmer(db, entry["swimmer"])
-        if entry["relay"]:
-            try:
-                swimmers = await db.fetchrow(
-                    "SELECT * FROM relays WHERE entry = $1", int(entry["id"])
-                )
-                s_list = [
-                    swimmers["swimmer_1"],
-                    swimmers["swimmer_2"],
-                    swimmers["swimmer_3"],
-                    swimmers["swimmer_4"],
-                ]
-                name = ""
-                for swimmer_id in s_list:
-                    swimmer = await fetch_swimmer_lite(db, swimmer_id)
-                    name += f", {swimmer['first_name'][0]} {swimmer['last_name']}"
-                name = name.strip()[2:]
-            except:
-                pass
-        else:
-            name = f"{s['first_name']} {s['last_name']}".strip()
-        m = await fetch_meet(db, entry["meet"])
-        e = {
-            "id": str(entry["id"]),
-            "swimmer": name,
-            "swimmer_id": s["id"],
-            "homeschool": s["homeschool"],
-            "meet": m,
-            "season": m["season"],
-            "event": await fetch_event(db, entry["event"]),
-            "seed": entry["seed"],
-            "time": entry["time"],
-            "splits": json.loads(entry["splits"]),
-            "standards": await fetch_standard(db, entry["standards"]),
-            "relay": None,
-        }
-        if entry["relay"]:
-            try:
-                swimmers = await db.fetchrow(
-                    "SELECT * FROM relays WHERE entry = $1", int(entry["id"])
-                )
-                e["relay"] = {
-                    "1": await fetch_swimmer_lite(db, swimmers["swimmer_1"]),
-                    "2": await fetch_swimmer_lite(db, swimmers["swimmer_2"]),
-                    "3": await fetch_swimmer_lite(db, swimmers["swimmer_3"]),
-                    "4": await fetch_swimmer_lite(db, swimmers["swimmer_4"]),
-                }
-            except:
-                pass
-        if e["homeschool"] and official:
-            continue
-        entries.append(e)
-    entries.sort(key=top5Sort)
-    swimmers = []
-    relayers = []
-    top5 = []
-    for entry in entries:
-        if entry["relay"]:
-            if entry["relay"] in relayers:
-                continue
-            else:
-                relayers.append(entry["relay"])
-                top5.append(entry)
-        elif entry["swimmer_id"] in swimmers:
-            continue
-        else:
-            swimmers.append(entry["swimmer_id"])
-            top5.append(entry)
-    return top5[:5]
+        exists = await db.fetchval(
+            "SELECT 1 FROM entries WHERE event = $1 AND ignored = false LIMIT 1",
+            str(id),
+        )
+        if not exists:
+            raise NotFoundException(f"Event {id} does not exist!")
+        return []
+    event = await fetch_event(db, id)
+    loaders = loaders or Loaders(db)
+    return list(
+        await asyncio.gather(*(hydrate_top_entry(loaders, event, row) for row in rows))
+    )
+
+
+async def hydrate_top_entry(loaders: "Loaders", event: dict, row) -> dict:
+    meet, standard = await asyncio.gather(
+        loaders.meets.load(row["meet"]), loaders.standard(row["standards"])
+    )
+    relay = await loaders.relay(row["id"]) if row["relay"] else None
+    if relay:
+        name = ", ".join(
+            f"{swimmer['first_name'][0]} {swimmer['last_name']}"
+            for swimmer in relay.values()
+            if swimmer
+        )
+    else:
+        name = f"{row['first_name']} {row['last_name']}".strip()
+    return {
+        "id": str(row["id"]),
+        "swimmer": name,
+        "swimmer_id": str(row["swimmer"]),
+        "homeschool": row["homeschool"],
+        "meet": meet,
+        "season": meet["season"],
+        "event": event,
+        "seed": row["seed"],
+        "time": row["time"],
+        "splits": row["splits"],
+        "standards": standard,
+        "relay": relay,
+    }
+
+
+async def fetch_event_top_five(db: asyncpg.Connection, id: str, official=True):
+    return await fetch_event_top_n(db, id, 5, official)
 
 
 async def fetch_entries_by_team(db: asyncpg.Connection, team, meet):
-    rows = await db.fetch(
-        "SELECT id FROM swimmers WHERE team = $1 ORDER BY last_name, first_name, middle_name",
-        str(team),
+    rows, m = await asyncio.gather(
+        db.fetch(TEAM_RESULTS_QUERY, int(meet), str(team)), fetch_meet(db, meet)
     )
     entries = {}
-    m = await fetch_meet(db, meet)
-    for swimmer in rows:
-        rows2 = await db.fetch(
-            "SELECT * FROM entries WHERE meet = $1 AND swimmer = $2  AND ignored = false",
-            int(meet),
-            int(swimmer["id"]),
-        )
-        for entry in rows2:
-            s = await fetch_swimmer(db, entry["swimmer"])
-            name = f"{s['last_name']}, {s['first_name']} {s['middle_name'][0]}"
-            e = {
-                "swim_id": str(s["id"]),
-                "swimmer": name,
-                "homeschool": s["homeschool"],
+    for row in rows:
+        if row["event"] not in entries:
+            entries[row["event"]] = []
+            event = event_from_row(unprefix(row, "event_"))
+        entries[row["event"]].append(
+            {
+                "swim_id": str(row["swimmer"]),
+                "swimmer": swimmer_results_name(row),
+                "homeschool": row["homeschool"],
                 "meet": m["designator"],
-                "event": await fetch_event(db, entry["event"]),
-                "seed": entry["seed"],
-                "time": entry["time"],
+                "event": event,
+                "seed": row["seed"],
+                "time": row["time"],
                 "season": m["season"],
-                "splits": json.loads(entry["splits"]),
-                "standards": await fetch_standard(db, entry["standards"]),
-                "relay": None,
+                "splits": row["splits"],
+                "standards": standard_from_joined(row),
+                "relay": relay_from_joined(row),
             }
-            if entry["relay"]:
-                try:
-                    swimmers = await db.fetchrow(
-                        "SELECT * FROM relays WHERE entry = $1", int(entry["id"])
-                    )
-                    e["relay"] = {
-                        "1": await fetch_swimmer_lite(db, swimmers["swimmer_1"]),
-                        "2": await fetch_swimmer_lite(db, swimmers["swimmer_2"]),
-                        "3": await fetch_swimmer_lite(db, swimmers["swimmer_3"]),
-                        "4": await fetch_swimmer_lite(db, swimmers["swimmer_4"]),
-                    }
-                except:
-                    pass
-            try:
-                entries[entry["event"]].append(e)
-            except KeyError:
-                entries[entry["event"]] = [e]
-    for event in entries:
-        entries[event].sort(key=sortByTime)
-    keys = list(entries.keys())
-    keys.sort()
-    sorted_entries = {i: entries[i] for i in keys}
-    return sorted_entries
+        )
+    return entries
 
 
 async def fetch_entries_by_meet(db: asyncpg.Connection, id: int):
-    rows = await db.fetch(
-        "SELECT event FROM entries WHERE meet = $1 AND ignored = false", int(id)
+    rows, meet = await asyncio.gather(
+        db.fetch(MEET_RESULTS_QUERY, int(id)), fetch_meet(db, id)
     )
-    if not rows:
+    entries = group_results(
+        rows,
+        lambda row, event: {
+            "swimmer": swimmer_results_name(row),
+            "homeschool": row["homeschool"],
+            "meet": meet,
+            "event": event,
+            "seed": row["seed"],
+            "time": row["time"],
+            "splits": row["splits"],
+            "standards": standard_from_joined(row),
+            "relay": relay_from_joined(row),
+        },
+    )
+    if not entries:
         raise NotFoundException(f"Meet {id} does not exist!")
-    entries = []
-    events = []
-    for event in rows:
-        event = event["event"]
-        if event in events:
-            continue
-        events += [event]
-        ev = await fetch_event(db, event)
-        obj = ev
-        obj["entries"] = []
-        rows1 = await db.fetch(
-            "SELECT * FROM entries WHERE meet = $1 AND event = $2", int(id), str(event)
-        )
-        for entry in rows1:
-            s = await fetch_swimmer(db, entry["swimmer"])
-            name = f"{s['last_name']}, {s['first_name']} {s['middle_name'][0]}".strip()
-            x = {
-                "swimmer": name,
-                "homeschool": s["homeschool"],
-                "meet": await fetch_meet(db, entry["meet"]),
-                "event": await fetch_event(db, entry["event"]),
-                "seed": entry["seed"],
-                "time": entry["time"],
-                "splits": json.loads(entry["splits"]),
-                "standards": await fetch_standard(db, entry["standards"]),
-                "relay": None,
-            }
-            if entry["relay"]:
-                try:
-                    swimmers = await db.fetchrow(
-                        "SELECT * FROM relays WHERE entry = $1", int(entry["id"])
-                    )
-                    x["relay"] = {
-                        "1": await fetch_swimmer_lite(db, swimmers["swimmer_1"]),
-                        "2": await fetch_swimmer_lite(db, swimmers["swimmer_2"]),
-                        "3": await fetch_swimmer_lite(db, swimmers["swimmer_3"]),
-                        "4": await fetch_swimmer_lite(db, swimmers["swimmer_4"]),
-                    }
-                except:
-                    pass
-            obj["entries"].append(x)
-        obj["entries"].sort(key=sortByTime)
-        entries.append(obj)
     return entries
 
 
-async def fetch_team_roster(db: asyncpg.Connection, id: str):
+async def fetch_roster(db: asyncpg.Connection, team: str, conditions: str = ""):
     rows = await db.fetch(
-        "SELECT id FROM swimmers WHERE team = $1 AND active = true AND manager = false ORDER BY last_name, first_name, middle_name",
-        str(id),
+        f"SELECT * FROM swimmers s WHERE s.team = $1 {conditions} "
+        "ORDER BY s.last_name, s.first_name, s.middle_name",
+        str(team),
+    )
+    return [swimmer_lite_from_row(row, row["entry_count"]) for row in rows]
+
+
+async def fetch_team_roster(db: asyncpg.Connection, id: str):
+    return await fetch_roster(
+        db,
+        id,
+        "AND s.active = true AND s.manager = false AND s.id NOT IN (1, 2, 3)",
     )
-    roster = []
-    for swimmer in rows:
-        if swimmer["id"] in [1, 2, 3]:
-            continue
-        s = await fetch_swimmer_lite(db, swimmer["id"])
-        roster.append(s)
-    return sorted(roster, key=lambda d: d["last_name"])
 
 
 async def fetch_team_managers(db: asyncpg.Connection, id: str):
-    rows = await db.fetch(
-        "SELECT id FROM swimmers WHERE team = $1 AND active = true AND manager = true",
-        str(id),
+    return await fetch_roster(
+        db,
+        id,
+        "AND s.active = true AND s.manager = true AND s.id NOT IN (1, 2, 3)",
     )
-    roster = []
-    for swimmer in rows:
-        if swimmer["id"] in [1, 2, 3]:
-            continue
-        s = await fetch_swimmer_lite(db, swimmer["id"])
-        roster.append(s)
-    return sorted(roster, key=lambda d: d["last_name"])
 
 
 async def fetch_team_roster_all(db: asyncpg.Connection, id: str):
-    rows = await db.fetch(
-        "SELECT id FROM swimmers WHERE team = $1 ORDER BY last_name, first_name, middle_name",
-        str(id),
-    )
-    roster = []
-    for swimmer in rows:
-        s = await fetch_swimmer_lite(db, swimmer["id"])
-        roster.append(s)
-    return sorted(roster, key=lambda d: d["last_name"])
+    return await fetch_roster(db, id)
 
 
 async def fetch_team_roster_all_noperms(db: asyncpg.Connection, id: str):
@@ -556,17 +909,10 @@ async def fetch_team_roster_all_noperms(db: asyncpg.Connection, id: str):
         "SELECT id, last_name, first_name, middle_name, class FROM swimmers WHERE team = $1 ORDER BY last_name, first_name, middle_name",
         str(id),
     )
-    roster = []
-    for swimmer in rows:
-        s = await fetch_swimmer_noperms(db, swimmer["id"])
-        roster.append(s)
-    return sorted(roster, key=lambda d: d["last_name"])
+    return [swimmer_noperms_from_row(row) for row in rows]
 
 
-async def fetch_team(db: asyncpg.Connection, id: str):
-    row = await db.fetchrow("SELECT * FROM teams WHERE code = $1", str(id))
-    if not row:
-        raise NotFoundException(f"Team {id} does not exist!")
+def team_from_row(row) -> dict:
     return {
         "name": row["name"],
         "address": row["address"],
@@ -578,20 +924,88 @@ async def fetch_team(db: asyncpg.Connection, id: str):
     }
 
 
-async def fetch_swimmer(db: asyncpg.Connection, id: int):
-    entries_i = await db.fetchrow(
-        "SELECT count(*) FROM entries WHERE swimmer = $1", int(id)
-    )
-    entries_r = await db.fetchrow(
-        "SELECT count(*) FROM relays WHERE $1 in (swimmer_1, swimmer_2, swimmer_3, swimmer_4)",
-        int(id),
-    )
-    meets = await db.fetch(
-        "SELECT DISTINCT meet FROM entries WHERE swimmer = $1", int(id)
-    )
-    row = await db.fetchrow("SELECT * FROM swimmers WHERE id = $1", int(id))
-    if not row:
-        raise NotFoundException(f"Swimmer {id} does not exist!")
+async def fetch_team(db: asyncpg.Connection, id: str):
+    teams = await fetch_teams(db, [id])
+    if str(id) not in teams:
+        raise NotFoundException(f"Team {id} does not exist!")
+    return teams[str(id)]
+
+
+async def fetch_teams(db: asyncpg.Connection, codes: list) -> dict:
+    return await reference_cache.get_many(db, "teams", codes)
+
+
+class ReferenceCache(CacheStats):
+    """
+    In-process copy of the events, standards and teams tables, which are small and
+    almost never change. Loaded by init_db and reloaded after create_standard or
+    create_team writes, or when any process runs NOTIFY reference_data, '<table>'.
+    Notifications carry '<table>:<sender>' when sent by changed(), so a process
+    skips its own and does not reload twice.
+    """
+
+    channel = "reference_data"
+
+    def __init__(self):
+        self.tables = {
+            "events": event_from_row,
+            "standards": standard_from_row,
+            "teams": team_from_row,
+        }
+        self.data = {table: {} for table in self.tables}
+        self.db = None
+        self.sender = secrets.token_hex(8)
+        self.tasks = set()
+
+    async def load(self, db: asyncpg.Pool, *tables):
+        self.db = db
+        for table in tables or self.tables:
+            rows = await db.fetch(f"SELECT * FROM {table}")
+            self.data[table] = {row["code"]: self.tables[table](row) for row in rows}
+
+    async def get_many(self, db: asyncpg.Connection, table: str, codes) -> dict:
+        cached = self.data[table]
+        codes = [str(code) for code in codes]
+        found = {code: cached[code] for code in codes if code in cached}
+        missing = [code for code in codes if code not in cached]
+        self.hits += len(found)
+        self.misses += len(missing)
+        if missing:
+            rows = await db.fetch(
+                f"SELECT * FROM {table} WHERE code = ANY($1::text[])", missing
+            )
+            for row in rows:
+                cached[row["code"]] = found[row["code"]] = self.tables[table](row)
+        return found
+
+    async def changed(self, db: asyncpg.Connection, table: str):
+        await self.load(self.db or db, table)
+        await db.execute(
+            "SELECT pg_notify($1, $2)", self.channel, f"{table}:{self.sender}"
+        )
+
+    def notified(self, connection, pid, channel, payload):
+        table, _, sender = payload.partition(":")
+        if sender == self.sender:
+            return
+        tables = [table] if table in self.tables else []
+        task = asyncio.ensure_future(self.load(self.db, *tables))
+        self.tasks.add(task)
+        task.add_done_callback(self.reloaded)
+
+    def reloaded(self, task: asyncio.Task):
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"reference data reload failed: {task.exception()}")
+
+    def counts(self) -> dict:
+        return {table: len(rows) for table, rows in self.data.items()}
+
+
+reference_cache = ReferenceCache()
+
+
+def swimmer_from_row(row, team: dict, entries: int, meets: list) -> dict:
     return {
         "id": str(row["id"]),
         "first_name": row["first_name"],
@@ -600,66 +1014,69 @@ async def fetch_swimmer(db: asyncpg.Connection, id: int):
         "age": row["age"],
         "gender": row["gender"],
         "class": row["class"],
-        "team": await fetch_team(db, row["team"]),
+        "team": team,
         "active": row["active"],
         "homeschool": row["homeschool"],
         "dob": row["dob"],
         "usas_id": row["usas_id"],
         "manager": row["manager"],
         "stats": {
-            "entries": entries_i[0] + entries_r[0],
-            "meet_count": len(meets),
-            "meets": json.dumps([list(record) for record in meets]),
+            "entries": entries,
+            "meet_count": row["meet_count"],
+            "meets": json.dumps([[meet] for meet in meets]),
         },
     }
 
 
+async def fetch_swimmer(db: asyncpg.Connection, id: int):
+    swimmers = await fetch_swimmers(db, [id])
+    if int(id) not in swimmers:
+        raise NotFoundException(f"Swimmer {id} does not exist!")
+    return swimmers[int(id)]
+
+
+async def fetch_swimmers(db: asyncpg.Connection, ids: list) -> dict:
+    rows = await db.fetch(SWIMMERS_QUERY, [int(id) for id in ids])
+    swimmers = {}
+    for row in rows:
+        team = None
+        if row["team_code"] is not None:
+            team = team_from_row(unprefix(row, "team_"))
+        swimmers[row["id"]] = swimmer_from_row(
+            row, team, row["entry_count"] + row["relay_count"], row["meets"]
+        )
+    return swimmers
+
+
 async def fetch_swimmer_entries(db: asyncpg.Connection, id: int):
-    rows = await db.fetch(
-        "SELECT event FROM entries WHERE swimmer = $1  AND ignored = false", int(id)
+    rows = await db.fetch(SWIMMER_HISTORY_QUERY, int(id))
+    entries = group_results(
+        rows,
+        lambda row, event: {
+            "swimmer": swimmer_results_name(row),
+            "homeschool": row["homeschool"],
+            "meet": meet_from_row(unprefix(row, "meet_")),
+            "event": event,
+            "seed": row["seed"],
+            "time": row["time"],
+            "splits": row["splits"],
+            "standards": standard_from_joined(row),
+        },
     )
-    if not rows:
+    if not entries:
         raise NotFoundException(f"Swimmer {id} does not exist!")
-    entries = []
-    events = []
-    for event in rows:
-        event = event["event"]
-        if event in events:
-            continue
-        events.append(event)
-        ev = await fetch_event(db, event)
-        obj = ev
-        obj["entries"] = []
-        rows1 = await db.fetch(
-            "SELECT * FROM entries WHERE swimmer = $1 AND event = $2",
-            int(id),
-            str(event),
-        )
-        for entry in rows1:
-            s = await fetch_swimmer(db, entry["swimmer"])
-            name = f"{s['last_name']}, {s['first_name']} {s['middle_name'][0]}".strip()
-            obj["entries"].append(
-                {
-                    "swimmer": name,
-                    "homeschool": s["homeschool"],
-                    "meet": await fetch_meet(db, entry["meet"]),
-                    "event": await fetch_event(db, entry["event"]),
-                    "seed": entry["seed"],
-                    "time": entry["time"],
-                    "splits": json.loads(entry["splits"]),
-                    "standards": await fetch_standard(db, entry["standards"]),
-                }
-            )
-        obj["entries"].sort(key=sortByTime)
-        entries.append(obj)
     return entries
 
 
-async def fetch_swimmer_best_times(db: asyncpg.Connection, id: int):
-    s = await fetch_swimmer_lite(db, id)
-    name = f"{s['last_name']}, {s['first_name']} {s['middle_name'][0]}".strip()
+async def fetch_swimmer_best_times(
+    db: asyncpg.Connection, id: int, loaders: "Loaders" = None
+):
+    loaders = loaders or Loaders(db)
+    s, rows = await asyncio.gather(
+        loaders.swimmers_lite.load(id), db.fetch(BEST_TIMES_QUERY, int(id))
+    )
+    name = swimmer_results_name(s)
     g = s["gender"].upper()
-    events_list = {}
     events = [
         f"{g}200F",
         f"{g}200M",
@@ -670,46 +1087,30 @@ async def fetch_swimmer_best_times(db: asyncpg.Connection, id: int):
         f"{g}100B",
         f"{g}100S",
     ]
-    for event in events:
-        entries = await fetch_swimmer_entries_event(db, id, event)
-        if not entries:
-            entry = {
-                "swimmer": name,
-                "time": "NT",
-                "meet": {"name": ""},
-                "event": await fetch_event(db, event),
-            }
-            events_list[event] = entry
-            continue
-        entries.sort(key=top5Sort)
-        fastest = entries[0]
-        try:
-            if fastest["splits"] == 0.0:
-                entry = {
-                    "swimmer": name,
-                    "time": "NT",
-                    "meet": {"name": ""},
-                    "event": await fetch_event(db, event),
-                }
-                events_list[event] = entry
-                continue
-        except IndexError:
-            pass
-        entry = {
+    best = {row["event"]: row for row in rows}
+
+    async def best_time(code):
+        event = await loaders.events.load(code)
+        fastest = best.get(code)
+        if fastest is None:
+            return {"swimmer": name, "time": "NT", "meet": {"name": ""}, "event": event}
+        return {
             "swimmer": name,
             "homeschool": s["homeschool"],
-            "meet": fastest["meet"],
-            "event": fastest["event"],
+            "meet": await loaders.meets.load(fastest["meet"]),
+            "event": event,
             "seed": fastest["seed"],
             "time": fastest["time"],
             "splits": fastest["splits"],
-            "standards": await fetch_standard(db, fastest["standards"]),
+            "standards": standard_from_joined(fastest),
         }
-        events_list[event] = entry
-    return events_list
+
+    return dict(zip(events, await asyncio.gather(*map(best_time, events))))
 
 
-async def fetch_swimmer_entries_event(db: asyncpg.Connection, id: int, event: str):
+async def fetch_swimmer_entries_event(
+    db: asyncpg.Connection, id: int, event: str, loaders: "Loaders" = None
+):
     rows = await db.fetch(
         "SELECT * FROM entries WHERE swimmer = $1 AND event = $2 AND ignored = false",
         int(id),
@@ -717,32 +1118,14 @@ async def fetch_swimmer_entries_event(db: asyncpg.Connection, id: int, event: st
     )
     if not rows:
         return []
-    entries = []
-    for entry in rows:
-        s = await fetch_swimmer(db, entry["swimmer"])
-        name = f"{s['last_name']}, {s['first_name']} {s['middle_name'][0]}".strip()
-        entries.append(
-            {
-                "swimmer": name,
-                "homeschool": s["homeschool"],
-                "meet": await fetch_meet(db, entry["meet"]),
-                "event": await fetch_event(db, entry["event"]),
-                "seed": entry["seed"],
-                "time": entry["time"],
-                "splits": json.loads(entry["splits"]),
-                "standards": await fetch_standard(db, entry["standards"]),
-            }
-        )
-    return entries
+    loaders = loaders or Loaders(db)
+    s = await loaders.swimmers_lite.load(id)
+    return list(
+        await asyncio.gather(*(hydrate_result(loaders, row, s) for row in rows))
+    )
 
 
-async def fetch_swimmer_lite(db: asyncpg.Connection, id: int):
-    entries = await db.fetchrow(
-        "SELECT count(*) FROM entries WHERE swimmer = $1", int(id)
-    )
-    row = await db.fetchrow("SELECT * FROM swimmers WHERE id = $1", int(id))
-    if not row:
-        raise NotFoundException(f"Swimmer {id} does not exist!")
+def swimmer_lite_from_row(row, entries: int) -> dict:
     return {
         "id": str(row["id"]),
         "first_name": row["first_name"],
@@ -756,14 +1139,36 @@ async def fetch_swimmer_lite(db: asyncpg.Connection, id: int):
         "usas_id": row["usas_id"],
         "dob": row["dob"],
         "manager": row["manager"],
-        "stats": {"entries": entries[0]},
+        "stats": {"entries": entries},
     }
 
 
-async def fetch_swimmer_noperms(db: asyncpg.Connection, id: int):
+def swimmer_lite_from_joined(row, prefix: str):
+    swimmer = unprefix(row, prefix)
+    if swimmer["id"] is None:
+        return None
+    return swimmer_lite_from_row(swimmer, swimmer["entry_count"])
+
+
+def swimmer_results_name(swimmer: dict) -> str:
+    middle = (swimmer["middle_name"] or "")[:1]
+    return f"{swimmer['last_name']}, {swimmer['first_name']} {middle}".strip()
+
+
+async def fetch_swimmer_lite(db: asyncpg.Connection, id: int):
     row = await db.fetchrow("SELECT * FROM swimmers WHERE id = $1", int(id))
     if not row:
         raise NotFoundException(f"Swimmer {id} does not exist!")
+    return swimmer_lite_from_row(row, row["entry_count"])
+
+
+async def fetch_swimmers_lite(db: asyncpg.Connection, ids: list) -> dict:
+    ids = [int(id) for id in ids]
+    rows = await db.fetch("SELECT * FROM swimmers WHERE id = ANY($1::bigint[])", ids)
+    return {row["id"]: swimmer_lite_from_row(row, row["entry_count"]) for row in rows}
+
+
+def swimmer_noperms_from_row(row) -> dict:
     return {
         "id": str(row["id"]),
         "first_name": row["first_name"],
@@ -773,21 +1178,32 @@ async def fetch_swimmer_noperms(db: asyncpg.Connection, id: int):
     }
 
 
-async def fetch_meet(db: asyncpg.Connection, id: int):
-    row = await db.fetchrow(
-        "SELECT * FROM meets WHERE id = $1 ORDER BY startdate", int(id)
-    )
+async def fetch_swimmer_noperms(db: asyncpg.Connection, id: int):
+    row = await db.fetchrow("SELECT * FROM swimmers WHERE id = $1", int(id))
     if not row:
-        raise NotFoundException(f"Meet {id} does not exist!")
+        raise NotFoundException(f"Swimmer {id} does not exist!")
+    return swimmer_noperms_from_row(row)
+
+
+def api_date(date):
+    """Meet dates are DATE columns but the API has always sent them as YYYYMMDD."""
+    return None if date is None else date.strftime("%Y%m%d")
+
+
+def parse_api_date(date):
+    return None if not date else datetime.datetime.strptime(date, "%Y%m%d").date()
+
+
+def meet_from_row(row) -> dict:
     return {
         "id": str(row["id"]),
-        "officialname": f"{row['startdate'][:4]} {row['host']} {row['name']}",
+        "officialname": row["officialname"],
         "name": row["name"],
         "venue": row["venue"],
         "designator": row["designator"],
-        "startdate": row["startdate"],
-        "enddate": row["enddate"],
-        "date": create_date(row["startdate"], row["enddate"]),
+        "startdate": api_date(row["startdate"]),
+        "enddate": api_date(row["enddate"]),
+        "date": row["display_date"],
         "season": row["season"],
         "host": row["host"],
         "notes": row["notes"],
@@ -807,165 +1223,209 @@ async def fetch_meet(db: asyncpg.Connection, id: int):
     }
 
 
+class MeetCache(CacheStats):
+    """
+    Serialized meets keyed by id. Before serving (at most once a second), the cache
+    compares the row count with what it holds and re-reads the meets updated since
+    its newest last_updated less `overlap`, since last_updated is the writer's
+    transaction start and a meet can commit after a sync with an older time. Only
+    meets that changed are replaced. Season lists are built on first use and kept
+    until a meet in that season changes.
+    """
+
+    interval = 1
+    overlap = datetime.timedelta(minutes=1)
+
+    def __init__(self):
+        self.meets = {}
+        self.seasons = {}
+        self.latest = None
+        self.checked = 0
+        self.lock = asyncio.Lock()
+
+    def store(self, row):
+        old = self.meets.get(row["id"])
+        if old:
+            self.seasons.pop(old["season"], None)
+        self.seasons.pop(row["season"], None)
+        self.meets[row["id"]] = meet_from_row(row)
+
+    async def sync(self, db: asyncpg.Connection):
+        if time.monotonic() - self.checked < self.interval:
+            return
+        async with self.lock:
+            if time.monotonic() - self.checked < self.interval:
+                return
+            total = await db.fetchval("SELECT count(*) FROM meets")
+            if total != len(self.meets):
+                rows = await db.fetch(f"SELECT {', '.join(MEET_FIELDS)} FROM meets")
+                self.meets, self.seasons, self.latest = {}, {}, None
+            elif self.latest is not None:
+                rows = await db.fetch(
+                    f"SELECT {', '.join(MEET_FIELDS)} FROM meets WHERE last_updated > $1",
+                    self.latest - self.overlap,
+                )
+            else:
+                rows = []
+            changed = False
+            for row in rows:
+                if self.meets.get(row["id"]) != meet_from_row(row):
+                    self.store(row)
+                    changed = True
+                if self.latest is None or row["last_updated"] > self.latest:
+                    self.latest = row["last_updated"]
+            if changed:
+                self.misses += 1
+            else:
+                self.hits += 1
+            self.checked = time.monotonic()
+
+    async def refresh(self, db: asyncpg.Connection, id: int) -> dict:
+        row = await db.fetchrow(
+            f"SELECT {', '.join(MEET_FIELDS)} FROM meets WHERE id = $1", int(id)
+        )
+        if not row:
+            raise NotFoundException(f"Meet {id} does not exist!")
+        # Leave self.latest alone: only sync() has seen every meet up to it, and
+        # moving it here would hide meets other writers commit with older times.
+        self.store(row)
+        return self.meets[row["id"]]
+
+    async def get_many(self, db: asyncpg.Connection, ids) -> dict:
+        await self.sync(db)
+        return {int(id): self.meets[int(id)] for id in ids if int(id) in self.meets}
+
+    async def all(self, db: asyncpg.Connection) -> list:
+        await self.sync(db)
+        meets = sorted(
+            self.meets.values(), key=lambda d: d["startdate"] or "", reverse=True
+        )
+        meets.sort(key=lambda d: d["season"], reverse=True)
+        return meets
+
+    async def season(self, db: asyncpg.Connection, season: int) -> list:
+        await self.sync(db)
+        if season not in self.seasons:
+            self.seasons[season] = sorted(
+                (meet for meet in self.meets.values() if meet["season"] == season),
+                key=lambda d: d["startdate"] or "",
+            )
+        return self.seasons[season]
+
+    async def latest_concluded(self, db: asyncpg.Connection):
+        await self.sync(db)
+        concluded = [meet for meet in self.meets.values() if meet["concluded"]]
+        return max(concluded, key=lambda d: d["startdate"] or "", default=None)
+
+    def counts(self) -> dict:
+        return {"meets": len(self.meets), "seasons": len(self.seasons)}
+
+
+meet_cache = MeetCache()
+
+
+async def fetch_meet(db: asyncpg.Connection, id: int):
+    meets = await meet_cache.get_many(db, [id])
+    if int(id) not in meets:
+        raise NotFoundException(f"Meet {id} does not exist!")
+    return meets[int(id)]
+
+
+async def fetch_meets(db: asyncpg.Connection, ids: list) -> dict:
+    return await meet_cache.get_many(db, ids)
+
+
 async def fetch_all_meets(db: asyncpg.Connection):
-    rows = await db.fetch("SELECT * FROM meets ORDER BY startdate DESC")
-    if not rows:
+    meets = await meet_cache.all(db)
+    if not meets:
         raise NotFoundException(f"Unexpected error!")
-    meets = []
-    for row in rows:
-        meets.append(
-            {
-                "season": row["season"],
-                "id": str(row["id"]),
-                "officialname": f"{row['startdate'][:4]} {row['host']} {row['name']}",
-                "name": row["name"],
-                "venue": row["venue"],
-                "designator": row["designator"],
-                "startdate": row["startdate"],
-                "enddate": row["enddate"],
-                "concluded": row["concluded"],
-                "format": row["format"],
-                "date": create_date(row["startdate"], row["enddate"]),
-                "host": row["host"],
-                "notes": row["notes"],
-                "pwarmups": row["pwarmups"],
-                "fwarmups": row["fwarmups"],
-                "pstart": row["pstart"],
-                "fstart": row["fstart"],
-                "infopath": row["infopath"],
-                "heatspath": row["heatspath"],
-                "sessionpath": row["sessionpath"],
-                "resultspath": row["resultspath"],
-                "scorespath": row["scorespath"],
-                "psychpath": row["psychpath"],
-                "last_updated": row["last_updated"].isoformat(),
-            }
-        )
-    meets.sort(key=lambda d: d["season"], reverse=True)
     return meets
 
 
 async def fetch_meets_by_season(db: asyncpg.Connection, season: int):
-    rows = await db.fetch(
-        "SELECT * FROM meets WHERE season = $1 ORDER BY startdate", int(season)
-    )
-    if not rows:
+    meets = await meet_cache.season(db, int(season))
+    if not meets:
         raise NotFoundException(f"No meets in season {season}")
-    meets = []
-    for row in rows:
-        meets.append(
-            {
-                "season": row["season"],
-                "id": str(row["id"]),
-                "officialname": f"{row['startdate'][:4]} {row['host']} {row['name']}",
-                "name": row["name"],
-                "venue": row["venue"],
-                "designator": row["designator"],
-                "startdate": row["startdate"],
-                "enddate": row["enddate"],
-                "concluded": row["concluded"],
-                "format": row["format"],
-                "date": create_date(row["startdate"], row["enddate"]),
-                "host": row["host"],
-                "notes": row["notes"],
-                "pwarmups": row["pwarmups"],
-                "fwarmups": row["fwarmups"],
-                "pstart": row["pstart"],
-                "fstart": row["fstart"],
-                "infopath": row["infopath"],
-                "heatspath": row["heatspath"],
-                "sessionpath": row["sessionpath"],
-                "resultspath": row["resultspath"],
-                "scorespath": row["scorespath"],
-                "psychpath": row["psychpath"],
-                "last_updated": row["last_updated"].isoformat(),
-            }
-        )
     return meets
 
 
 async def fetch_latest_meet(db: asyncpg.Connection):
-    row = await db.fetchrow(
-        "SELECT * FROM meets WHERE concluded = true ORDER BY startdate DESC LIMIT 1"
-    )
-    if not row:
+    meet = await meet_cache.latest_concluded(db)
+    if not meet:
         raise NotFoundException(f"No recent meet!")
+    return meet
+
+
+# Public meet pages are polled, so let clients and proxies revalidate cheaply.
+PUBLIC_MAX_AGE = 30
+
+
+def meet_validators(meets: list, *extra) -> dict:
+    """
+    ETag, Last-Modified and Cache-Control headers for a response built only from
+    these meets (plus any extra values, such as a date window, that shape it).
+    """
+    versions = [f"{meet['id']}@{meet['last_updated']}" for meet in meets]
+    tag = hashlib.sha1("|".join([*map(str, extra), *versions]).encode()).hexdigest()
+    headers = {
+        "ETag": f'"{tag[:20]}"',
+        "Cache-Control": f"public, max-age={PUBLIC_MAX_AGE}, "
+        f"stale-while-revalidate={PUBLIC_MAX_AGE}",
+    }
+    if meets:
+        modified = max(
+            datetime.datetime.fromisoformat(meet["last_updated"]) for meet in meets
+        )
+        if modified.tzinfo is None:
+            modified = modified.replace(tzinfo=datetime.timezone.utc)
+        headers["Last-Modified"] = format_datetime(modified, usegmt=True)
+    return headers
+
+
+def not_modified(request: web.Request, headers: dict) -> bool:
+    if "If-None-Match" in request.headers:
+        tags = [tag.strip() for tag in request.headers["If-None-Match"].split(",")]
+        return "*" in tags or headers["ETag"] in tags or f"W/{headers['ETag']}" in tags
+    since = request.if_modified_since
+    if since is None or "Last-Modified" not in headers:
+        return False
+    return parsedate_to_datetime(headers["Last-Modified"]) <= since
+
+
+def user_from_row(row, linked_swimmer) -> dict:
     return {
         "id": str(row["id"]),
+        "username": row["username"],
         "name": row["name"],
-        "officialname": f"{row['startdate'][:4]} {row['host']} {row['name']}",
-        "venue": row["venue"],
-        "designator": row["designator"],
-        "startdate": row["startdate"],
-        "enddate": row["enddate"],
-        "concluded": row["concluded"],
-        "format": row["format"],
-        "date": create_date(row["startdate"], row["enddate"]),
-        "season": row["season"],
-        "host": row["host"],
-        "notes": row["notes"],
-        "pwarmups": row["pwarmups"],
-        "fwarmups": row["fwarmups"],
-        "pstart": row["pstart"],
-        "fstart": row["fstart"],
-        "infopath": row["infopath"],
-        "heatspath": row["heatspath"],
-        "sessionpath": row["sessionpath"],
-        "resultspath": row["resultspath"],
-        "scorespath": row["scorespath"],
-        "psychpath": row["psychpath"],
-        "last_updated": row["last_updated"].isoformat(),
+        "email": row["email"],
+        "permissions": row["permissions"],
+        "active": row["active"],
+        "linked_swimmer": linked_swimmer,
+        "latest_access": row["latest_access"].strftime("%Y-%m-%d %H:%M:%S"),
     }
 
 
 async def fetch_all_users(db: asyncpg.Connection):
-    rows = await db.fetch(
-        "SELECT id, username, name, email, permissions, active, linked_swimmer, latest_access FROM users ORDER BY name"
-    )
+    rows = await db.fetch(USERS_QUERY + "ORDER BY u.name")
     if not rows:
         raise NotFoundException(f"No users found!")
-    users = []
-    for row in rows:
-        if row["linked_swimmer"]:
-            ls = await fetch_swimmer_lite(db, row["linked_swimmer"])
-        else:
-            ls = None
-        users.append(
-            {
-                "id": str(row["id"]),
-                "username": row["username"],
-                "name": row["name"],
-                "email": row["email"],
-                "permissions": row["permissions"],
-                "linked_swimmer": ls,
-                "active": row["active"],
-                "latest_access": row["latest_access"].strftime("%Y-%m-%d %H:%M:%S"),
-            }
-        )
-    return users
+    return [user_from_row(row, swimmer_lite_from_joined(row, "ls_")) for row in rows]
 
 
 async def fetch_user(db: asyncpg.Connection, id: int):
-    row = await db.fetchrow(
-        "SELECT id, username, name, email, permissions, active, linked_swimmer, latest_access "
-        "FROM users WHERE id = $1",
-        int(id),
-    )
+    row = await db.fetchrow(USERS_QUERY + "WHERE u.id = $1", int(id))
     if not row:
         raise NotFoundException(f"No user found!")
-    if row["linked_swimmer"]:
-        ls = await fetch_swimmer_lite(db, row["linked_swimmer"])
-    else:
-        ls = None
+    return user_from_row(row, swimmer_lite_from_joined(row, "ls_"))
+
+
+def linking_request_from_row(row) -> dict:
     return {
-        "id": str(row["id"]),
-        "username": row["username"],
-        "name": row["name"],
-        "email": row["email"],
-        "permissions": row["permissions"],
-        "active": row["active"],
-        "linked_swimmer": ls,
-        "latest_access": row["latest_access"].strftime("%Y-%m-%d %H:%M:%S"),
+        "swimmer": swimmer_lite_from_joined(row, "rs_"),
+        "submitted_at": row["created_at"].strftime("%Y-%m-%d %H:%M:%S"),
+        "status": row["status"],
+        "code_match": row["code_match"],
+        "dob_match": row["dob_match"],
     }
 
 
@@ -990,6 +1450,137 @@ def handle_json_error(
     return handler
 
 
+class ResponseCache(CacheStats):
+    """
+    Short-lived cache for expensive public pages. Concurrent requests for the same
+    key share one in-flight computation instead of each running it.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.inflight = {}
+        self.coalesced = 0
+
+    async def get(self, key: str, ttl: float, compute: Callable[[], Awaitable]):
+        if key in self.entries:
+            expires, value = self.entries[key]
+            if time.monotonic() < expires:
+                self.hits += 1
+                return value
+        if key in self.inflight:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            self.inflight[key] = asyncio.ensure_future(self.compute(key, ttl, compute))
+        return await asyncio.shield(self.inflight[key])
+
+    async def compute(self, key: str, ttl: float, compute: Callable[[], Awaitable]):
+        try:
+            value = await compute()
+            self.entries[key] = (time.monotonic() + ttl, value)
+            return value
+        finally:
+            del self.inflight[key]
+
+    def counts(self) -> dict:
+        return {"coalesced": self.coalesced, "entries": len(self.entries)}
+
+
+response_cache = ResponseCache()
+
+# Seconds a rendered records page is served before it is rebuilt.
+RECORDS_TTL = 60
+
+
+class PrincipalCache(CacheStats):
+    """
+    Token -> user cache for auth_required. Entries live for a few seconds so a
+    revoked token or changed permissions take effect quickly even when another
+    process made the change; this process drops them at once via invalidate.
+    """
+
+    ttl = 10
+    query = (
+        "SELECT t.user_id, u.name, u.username, u.email, u.permissions, u.active, "
+        "u.linked_swimmer FROM auth_tokens t JOIN users u ON u.id = t.user_id "
+        "WHERE t.token = $1"
+    )
+
+    def __init__(self):
+        self.principals = {}
+
+    async def get(self, db: asyncpg.Connection, token: str):
+        now = time.monotonic()
+        if token in self.principals:
+            expires, principal = self.principals[token]
+            if now < expires:
+                self.hits += 1
+                return principal
+        self.misses += 1
+        principal = await db.fetchrow(self.query, token)
+        if principal is None:
+            self.principals.pop(token, None)
+            return None
+        if len(self.principals) > 4096:
+            self.principals = {k: v for k, v in self.principals.items() if now < v[0]}
+        self.principals[token] = (now + self.ttl, principal)
+        return principal
+
+    def invalidate(self, user_id: int = None, token: str = None):
+        for key, (expires, principal) in list(self.principals.items()):
+            if key == token or principal["user_id"] == user_id:
+                del self.principals[key]
+
+    def clear(self):
+        self.principals = {}
+
+    def counts(self) -> dict:
+        return {"tokens": len(self.principals)}
+
+
+principal_cache = PrincipalCache()
+
+
+class AccessRecorder:
+    """
+    Collects the users seen by auth_check and writes their latest_access in one
+    UPDATE every few seconds, instead of one write per page load. The timestamp
+    is the flush time, so it may lag the real access by up to `interval` seconds.
+    """
+
+    interval = 30
+
+    def __init__(self):
+        self.pending = set()
+
+    def touch(self, user_id: int):
+        self.pending.add(int(user_id))
+
+    async def flush(self, db: asyncpg.Pool):
+        if not self.pending:
+            return
+        users, self.pending = self.pending, set()
+        try:
+            await db.execute(
+                "UPDATE users SET latest_access = default WHERE id = ANY($1::bigint[])",
+                list(users),
+            )
+        except BaseException:
+            self.pending |= users
+            raise
+
+    async def run(self, db: asyncpg.Pool):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush(db)
+            except Exception as ex:
+                print(f"latest_access flush failed: {ex}")
+
+
+access_recorder = AccessRecorder()
+
+
 async def auth_required(request: web.Request, permissions: int = 0):
     try:
         token = request.headers["token"]
@@ -1002,27 +1593,23 @@ async def auth_required(request: web.Request, permissions: int = 0):
             status=400,
         )
     db = request.config_dict["DB"]
-    r = await db.fetchrow(
-        "SELECT user_id FROM auth_tokens WHERE token = $1", str(token)
-    )
+    r = await principal_cache.get(db, str(token))
     if r is None:
         resp = web.json_response(
             {"status": "unauthorized", "reason": "mismatched token"}, status=401
         )
         return resp
     else:
-        r2 = await db.fetchrow(
-            "SELECT permissions FROM users WHERE id = $1", int(r["user_id"])
-        )
-        if permissions <= r2["permissions"]:
+        if permissions <= r["permissions"]:
             resp = web.json_response({"status": "ok", "id": str(r["user_id"])})
             resp.user_id = r["user_id"]
+            resp.principal = r
             return resp
         else:
             resp = web.json_response(
                 {
                     "status": "forbidden",
-                    "reason": f"you do not have sufficient permissions to access this endpoint! level {permissions} required, you have {r2['permissions']}",
+                    "reason": f"you do not have sufficient permissions to access this endpoint! level {permissions} required, you have {r['permissions']}",
                 },
                 status=403,
             )
@@ -1069,6 +1656,7 @@ async def create_standard(request: web.Request) -> web.Response:
         course,
     )
     await db.execute("UPDATE standards set event = $1 where code = $2", event, code)
+    await reference_cache.changed(db, "standards")
     return web.json_response(info)
 
 
@@ -1142,16 +1730,8 @@ async def auth_check(request: web.Request) -> web.Response:
     a = await auth_required(request, permissions=0)
     if a.status != 200:
         return a
-    token = strip_token(request.headers["token"])
-    db = request.config_dict["DB"]
-    r = await db.fetchrow(
-        "SELECT name, username, email, permissions, active, linked_swimmer FROM users WHERE id = $1",
-        int(token["user_id"]),
-    )
-    ts = datetime.datetime.now().isoformat()
-    await db.execute(
-        "UPDATE users SET latest_access = default WHERE id = $1", int(token["user_id"])
-    )
+    r = a.principal
+    access_recorder.touch(r["user_id"])
     if r["active"] is False:
         return web.json_response(
             {"status": "failed", "reason": "forbidden"}, status=403
@@ -1164,7 +1744,7 @@ async def auth_check(request: web.Request) -> web.Response:
         {
             "status": "ok",
             "user": {
-                "id": str(token["user_id"]),
+                "id": str(r["user_id"]),
                 "name": r["name"],
                 "username": r["username"],
                 "email": r["email"],
@@ -1271,6 +1851,7 @@ async def req_linking(request: web.Request) -> web.Response:
             int(swimmer["id"]),
             int(user_id),
         )
+        principal_cache.invalidate(user_id=int(user_id))
     elif verf_code == team["verification_code"] and dob != swimmer["dob"]:
         await db.execute(
             "INSERT INTO linking_requests (user_id, swimmer_id, code_match, dob_match) VALUES ($1, "
@@ -1304,20 +1885,9 @@ async def linking_requests(request: web.Request) -> web.Response:
         return a
     db = request.config_dict["DB"]
     reqs = await db.fetch(
-        "SELECT * FROM linking_requests WHERE user_id = $1", int(a.user_id)
+        LINKING_REQUESTS_QUERY + "WHERE lr.user_id = $1", int(a.user_id)
     )
-    reqs_list = []
-    for req in reqs:
-        reqs_list.append(
-            {
-                "swimmer": await fetch_swimmer_lite(db, req["swimmer_id"]),
-                "submitted_at": req["created_at"].strftime("%Y-%m-%d %H:%M:%S"),
-                "status": req["status"],
-                "code_match": req["code_match"],
-                "dob_match": req["dob_match"],
-            }
-        )
-    return web.json_response(reqs_list)
+    return web.json_response([linking_request_from_row(req) for req in reqs])
 
 
 @router.get("/users/linking/requestqueue")
@@ -1326,19 +1896,11 @@ async def linking_requests_queue(request: web.Request) -> web.Response:
     if a.status != 200:
         return a
     db = request.config_dict["DB"]
-    reqs = await db.fetch("SELECT * FROM linking_requests WHERE status = 'unapproved'")
+    reqs = await db.fetch(LINKING_QUEUE_QUERY + "WHERE lr.status = 'unapproved'")
     reqs_list = []
     for req in reqs:
-        reqs_list.append(
-            {
-                "user": await fetch_user(db, req["user_id"]),
-                "swimmer": await fetch_swimmer_lite(db, req["swimmer_id"]),
-                "submitted_at": req["created_at"].strftime("%Y-%m-%d %H:%M:%S"),
-                "status": req["status"],
-                "code_match": req["code_match"],
-                "dob_match": req["dob_match"],
-            }
-        )
+        user = user_from_row(unprefix(req, "u_"), swimmer_lite_from_joined(req, "ls_"))
+        reqs_list.append({"user": user, **linking_request_from_row(req)})
     return web.json_response(reqs_list)
 
 
@@ -1354,6 +1916,7 @@ async def approve_linking(request: web.Request) -> web.Response:
     await db.execute(
         "UPDATE users SET linked_swimmer = $1 WHERE id = $2", swimmer_id, user_id
     )
+    principal_cache.invalidate(user_id=user_id)
     await db.execute(
         "UPDATE linking_requests SET status = 'approved', approved_by = $1 WHERE user_id = $2 AND swimmer_id = $3",
         str(a.user_id),
@@ -1488,6 +2051,7 @@ async def edit_user(request: web.Request) -> web.Response:
         for field in fields:
             field_values += f"{field} = {fields[field]}"
         await db.execute(f"UPDATE users SET {field_values} WHERE id = $1", int(user_id))
+        principal_cache.invalidate(user_id=int(user_id))
     user = await db.fetchrow("SELECT * FROM users WHERE id = $1", int(user_id))
     return web.json_response(
         {
@@ -1533,6 +2097,7 @@ async def change_password(request: web.Request) -> web.Response:
         await db.execute(
             "UPDATE users SET password = $1 WHERE id = $2", hashed, int(id)
         )
+        principal_cache.invalidate(user_id=int(id))
         return web.json_response({"status": "ok", "reason": "password reset!"})
 
 
@@ -1568,6 +2133,19 @@ async def login(request: web.Request) -> web.Response:
         return web.json_response({"user_id": str(r["id"]), "token": token})
 
 
+@router.post("/auth/logout")
+@handle_json_error
+async def logout(request: web.Request) -> web.Response:
+    a = await auth_required(request, permissions=0)
+    if a.status != 200:
+        return a
+    token = request.headers["token"]
+    db = request.config_dict["DB"]
+    await db.execute("DELETE FROM auth_tokens WHERE token = $1", str(token))
+    principal_cache.invalidate(token=str(token))
+    return web.json_response({"status": "ok", "reason": "logged out!"})
+
+
 # Swimmer Queries
 @router.post("/swimmers")
 @handle_json_error
@@ -1685,22 +2263,66 @@ async def change_class_status(request: web.Request) -> web.Response:
     await db.execute(
         "UPDATE swimmers SET active = $1 WHERE class = $2", active, int(class_id)
     )
+    principal_cache.clear()
     return web.json_response({"status": "ok", "reason": "updated!"})
 
 
+class InfoSnapshot:
+    """
+    Row counts for /info, which is polled as a health probe. The counts are
+    refreshed at most once a minute by whichever request finds them stale; the
+    probe itself still checks the database on every request.
+    """
+
+    interval = 60
+
+    def __init__(self):
+        self.counts = None
+        self.taken = 0
+        self.lock = asyncio.Lock()
+
+    async def refresh(self, db: asyncpg.Connection) -> dict:
+        row = await db.fetchrow(
+            "SELECT (SELECT count(*) FROM entries) AS entries, "
+            "(SELECT count(*) FROM meets) AS meets, "
+            "(SELECT count(*) FROM swimmers) AS athletes"
+        )
+        self.counts = {
+            "entries": row["entries"],
+            "meets": row["meets"],
+            "athletes": row["athletes"],
+            "updated": datetime.datetime.now().isoformat(),
+        }
+        self.taken = time.monotonic()
+        return self.counts
+
+    async def get(self, db: asyncpg.Connection) -> dict:
+        if self.counts is None or time.monotonic() - self.taken >= self.interval:
+            async with self.lock:
+                if (
+                    self.counts is None
+                    or time.monotonic() - self.taken >= self.interval
+                ):
+                    await self.refresh(db)
+        return self.counts
+
+
+info_snapshot = InfoSnapshot()
+
+
 @router.get("/info")
 @handle_json_error
 async def db_info(request: web.Request) -> web.Response:
     db = request.config_dict["DB"]
-    entries = await db.fetchrow("SELECT count(*) from entries")
-    meets = await db.fetchrow("SELECT count(*) from meets")
-    athletes = await db.fetchrow("SELECT count(*) from swimmers")
-    response = {
-        "status": "online",
-        "entries": entries["count"],
-        "meets": meets["count"],
-        "athletes": athletes["count"],
-    }
+    await db.fetchval("SELECT 1")
+    if request.query.get("exact") == "1":
+        a = await auth_required(request, permissions=5)
+        if a.status != 200:
+            return a
+        counts = await info_snapshot.refresh(db)
+    else:
+        counts = await info_snapshot.get(db)
+    response = {"status": "online", **counts}
     return web.json_response(response)
 
 
@@ -1735,7 +2357,9 @@ async def get_swimmer_all_entries_event(request: web.Request) -> web.Response:
     swimmer_id = int(request.match_info["id"])
     event_code = request.match_info["event"]
     db = request.config_dict["DB"]
-    entries = await fetch_swimmer_entries_event(db, swimmer_id, event_code)
+    entries = await fetch_swimmer_entries_event(
+        db, swimmer_id, event_code, request["loaders"]
+    )
     return web.json_response(entries)
 
 
@@ -1747,7 +2371,7 @@ async def get_swimmer_bests(request: web.Request) -> web.Response:
         return a
     swimmer_id = int(request.match_info["id"])
     db = request.config_dict["DB"]
-    entries = await fetch_swimmer_best_times(db, swimmer_id)
+    entries = await fetch_swimmer_best_times(db, swimmer_id, request["loaders"])
     return web.json_response(entries)
 
 
@@ -1777,6 +2401,7 @@ async def create_team(request: web.Request) -> web.Response:
         phone,
         code,
     )
+    await reference_cache.changed(db, "teams")
     return web.json_response(
         {
             "id": str(id),
@@ -1877,12 +2502,13 @@ async def create_meet(request: web.Request) -> web.Response:
         name,
         venue,
         designator,
-        startdate,
+        parse_api_date(startdate),
         season,
         concluded,
         host,
         format,
     )
+    await meet_cache.refresh(db, id)
     return web.json_response(
         {
             "id": str(id),
@@ -1906,6 +2532,7 @@ async def update_meet_dtinfo(request: web.Request) -> web.Response:
     info = await request.json()
     fields = {}
     meet_id = int(request.match_info["id"])
+    values = [meet_id]
     if "pwarmups" in info:
         fields["pwarmups"] = f"'{info['pwarmups']}'"
     if "fwarmups" in info:
@@ -1914,10 +2541,10 @@ async def update_meet_dtinfo(request: web.Request) -> web.Response:
         fields["pstart"] = f"'{info['pstart']}'"
     if "fstart" in info:
         fields["fstart"] = f"'{info['fstart']}'"
-    if "startdate" in info:
-        fields["startdate"] = f"'{info['startdate']}'"
-    if "enddate" in info:
-        fields["enddate"] = f"'{info['enddate']}'"
+    for date_field in ("startdate", "enddate"):
+        if date_field in info:
+            values.append(parse_api_date(info[date_field]))
+            fields[date_field] = f"${len(values)}"
     db = request.config_dict["DB"]
     if fields:
         field_values = ""
@@ -1925,34 +2552,10 @@ async def update_meet_dtinfo(request: web.Request) -> web.Response:
             field_values += f"{field} = {fields[field]}, "
         await db.execute(
             f"UPDATE meets SET {field_values[:-2]}, last_updated = default WHERE id = $1",
-            int(meet_id),
+            *values,
         )
-    meet = await db.fetchrow("SELECT * FROM meets WHERE id = $1", int(meet_id))
-    return web.json_response(
-        {
-            "id": str(meet_id),
-            "name": meet["name"],
-            "venue": meet["venue"],
-            "designator": meet["designator"],
-            "startdate": meet["startdate"],
-            "enddate": meet["enddate"],
-            "season": meet["season"],
-            "concluded": meet["concluded"],
-            "host": meet["host"],
-            "format": meet["format"],
-            "pwarmups": meet["pwarmups"],
-            "fwarmups": meet["fwarmups"],
-            "pstart": meet["pstart"],
-            "fstart": meet["fstart"],
-            "infopath": meet["infopath"],
-            "heatspath": meet["heatspath"],
-            "sessionpath": meet["sessionpath"],
-            "resultspath": meet["resultspath"],
-            "scorespath": meet["scorespath"],
-            "psychpath": meet["psychpath"],
-            "last_updated": meet["last_updated"].isoformat(),
-        }
-    )
+    meet = await meet_cache.refresh(db, meet_id)
+    return web.json_response(meet)
 
 
 @router.patch("/meets/{id}/geninfo")
@@ -1988,32 +2591,8 @@ async def update_meet_geninfo(request: web.Request) -> web.Response:
             f"UPDATE meets SET {field_values[:-2]}, last_updated = default WHERE id = $1",
             int(meet_id),
         )
-    meet = await db.fetchrow("SELECT * FROM meets WHERE id = $1", int(meet_id))
-    return web.json_response(
-        {
-            "id": str(meet_id),
-            "name": meet["name"],
-            "venue": meet["venue"],
-            "designator": meet["designator"],
-            "startdate": meet["startdate"],
-            "enddate": meet["enddate"],
-            "season": meet["season"],
-            "concluded": meet["concluded"],
-            "host": meet["host"],
-            "format": meet["format"],
-            "pwarmups": meet["pwarmups"],
-            "fwarmups": meet["fwarmups"],
-            "pstart": meet["pstart"],
-            "fstart": meet["fstart"],
-            "infopath": meet["infopath"],
-            "heatspath": meet["heatspath"],
-            "sessionpath": meet["sessionpath"],
-            "resultspath": meet["resultspath"],
-            "scorespath": meet["scorespath"],
-            "psychpath": meet["psychpath"],
-            "last_updated": meet["last_updated"].isoformat(),
-        }
-    )
+    meet = await meet_cache.refresh(db, meet_id)
+    return web.json_response(meet)
 
 
 @router.patch("/meets/{id}/filesinfo")
@@ -2045,32 +2624,8 @@ async def update_meet_filesinfo(request: web.Request) -> web.Response:
             f"UPDATE meets SET {field_values[:-2]}, last_updated = default WHERE id = $1",
             int(meet_id),
         )
-    meet = await db.fetchrow("SELECT * FROM meets WHERE id = $1", int(meet_id))
-    return web.json_response(
-        {
-            "id": str(meet_id),
-            "name": meet["name"],
-            "venue": meet["venue"],
-            "designator": meet["designator"],
-            "startdate": meet["startdate"],
-            "enddate": meet["enddate"],
-            "season": meet["season"],
-            "concluded": meet["concluded"],
-            "host": meet["host"],
-            "format": meet["format"],
-            "pwarmups": meet["pwarmups"],
-            "fwarmups": meet["fwarmups"],
-            "pstart": meet["pstart"],
-            "fstart": meet["fstart"],
-            "infopath": meet["infopath"],
-            "heatspath": meet["heatspath"],
-            "sessionpath": meet["sessionpath"],
-            "resultspath": meet["resultspath"],
-            "scorespath": meet["scorespath"],
-            "psychpath": meet["psychpath"],
-            "last_updated": meet["last_updated"].isoformat(),
-        }
-    )
+    meet = await meet_cache.refresh(db, meet_id)
+    return web.json_response(meet)
 
 
 @router.get("/meets/{id}")
@@ -2095,7 +2650,10 @@ async def get_meet_entries(request: web.Request) -> web.Response:
 async def get_all_meets(request: web.Request) -> web.Response:
     db = request.config_dict["DB"]
     meets = await fetch_all_meets(db)
-    return web.json_response(meets)
+    headers = meet_validators(meets)
+    if not_modified(request, headers):
+        return web.Response(status=304, headers=headers)
+    return web.json_response(meets, headers=headers)
 
 
 @router.get("/season/{code}/meets")
@@ -2104,7 +2662,55 @@ async def get_season_meets(request: web.Request) -> web.Response:
     db = request.config_dict["DB"]
     season = request.match_info["code"]
     meets = await fetch_meets_by_season(db, season)
-    return web.json_response(meets)
+    headers = meet_validators(meets)
+    if not_modified(request, headers):
+        return web.Response(status=304, headers=headers)
+    return web.json_response(meets, headers=headers)
+
+
+# Rendered schedule rows, keyed by (layout, meet id) and valid for one last_updated.
+meet_fragments = {}
+
+# (document, file path key) for the links in a meet's files column, in display order.
+MEET_FILES = [
+    ("INFO", "infopath"),
+    ("HEATS", "heatspath"),
+    ("PSYCH", "psychpath"),
+    ("SESSIONS", "sessionpath"),
+    ("RESULTS", "resultspath"),
+    ("SCORES", "scorespath"),
+]
+
+
+def render_meet_row(meet: dict, layout: str) -> str:
+    if meet["format"] == "pf":
+        times = f'Warmups @ {meet["pwarmups"]} (P) {meet["fwarmups"]} (F) | Meet @ {meet["pstart"]} (P) {meet["fstart"]} (F)'
+    else:
+        times = f'Warmups @ {meet["fwarmups"]} | Meet @ {meet["fstart"]}'
+    files = "<br>".join(
+        f'<b style="text-decoration: underline"><a href="{meet[path]}">{name}</a></b>'
+        for name, path in MEET_FILES
+        if meet[path]
+    )
+    color = venue_colors[meet["venue"]]
+    info = f'<b>{meet["officialname"]}</b><br>{venues[meet["venue"]]} ({meet["venue"]})<br>{meet["date"]}<br>{times}<br><b style="color: darkred">{meet["notes"]}</b>'
+    if layout == "schedule":
+        return f'<tr class="meet-row" id="{(meet["startdate"] or "")[:-4]}-{meet["designator"]}"><td style="width: 80%; background-color: #{color};" class="meet-info-col">{info}</td><td style="width: 20%; background-color: #{color};" class="meet-files-col">{files}</td></tr>'
+    return f'<tr class="meet-row"><td style="width: 85%; background-color: #{color};" class="meet-info-col">{info}</td><td style="width:15%; background-color: #{color};" class="meet-files-col">{files}</td></tr>'
+
+
+def render_meet_rows(meets: list, layout: str) -> str:
+    rows = []
+    for meet in meets:
+        key = (layout, meet["id"])
+        cached = meet_fragments.get(key)
+        if cached is None or cached[0] != meet["last_updated"]:
+            cached = meet_fragments[key] = (
+                meet["last_updated"],
+                render_meet_row(meet, layout),
+            )
+        rows.append(cached[1])
+    return "".join(rows)
 
 
 @router.get("/season/{code}/meets/schedule")
@@ -2113,30 +2719,14 @@ async def get_season_schedule(request: web.Request) -> web.Response:
     db = request.config_dict["DB"]
     season = request.match_info["code"]
     meets = await fetch_meets_by_season(db, season)
+    headers = meet_validators(meets, "schedule")
+    if not_modified(request, headers):
+        return web.Response(status=304, headers=headers)
     html = (
         '<tr><th style="width: 80%;">Meet</th><th style="width: 20%;">Files</th></tr>'
+        + render_meet_rows(meets, "schedule")
     )
-    for meet in meets:
-        times = ""
-        if meet["format"] == "pf":
-            times = f'Warmups @ {meet["pwarmups"]} (P) {meet["fwarmups"]} (F) | Meet @ {meet["pstart"]} (P) {meet["fstart"]} (F)'
-        else:
-            times = f'Warmups @ {meet["fwarmups"]} | Meet @ {meet["fstart"]}'
-        files = ""
-        if meet["infopath"]:
-            files += f'<b style="text-decoration: underline"><a href="{meet["infopath"]}">INFO</a></b><br>'
-        if meet["heatspath"]:
-            files += f'<b style="text-decoration: underline"><a href="{meet["heatspath"]}">HEATS</a></b><br>'
-        if meet["psychpath"]:
-            files += f'<b style="text-decoration: underline"><a href="{meet["psychpath"]}">PSYCH</a></b><br>'
-        if meet["sessionpath"]:
-            files += f'<b style="text-decoration: underline"><a href="{meet["sessionpath"]}">SESSIONS</a></b><br>'
-        if meet["resultspath"]:
-            files += f'<b style="text-decoration: underline"><a href="{meet["resultspath"]}">RESULTS</a></b><br>'
-        if meet["scorespath"]:
-            files += f'<b style="text-decoration: underline"><a href="{meet["scorespath"]}">SCORES</a></b><br>'
-        html += f'<tr class="meet-row" id="{meet["startdate"][:-4]}-{meet["designator"]}"><td style="width: 80%; background-color: #{venue_colors[meet["venue"]]};" class="meet-info-col"><b>{meet["officialname"]}</b><br>{venues[meet["venue"]]} ({meet["venue"]})<br>{create_date(meet["startdate"], meet["enddate"])}<br>{times}<br><b style="color: darkred">{meet["notes"]}</b></td><td style="width: 20%; background-color: #{venue_colors[meet["venue"]]};" class="meet-files-col">{files[:-4]}</td></tr>'
-    return web.Response(body=html)
+    return web.Response(body=html, headers=headers)
 
 
 @router.get("/season/{code}/meets/lastupdate")
@@ -2158,42 +2748,30 @@ async def get_last_meet_update(request: web.Request) -> web.Response:
 async def get_latest_meet(request: web.Request) -> web.Response:
     db = request.config_dict["DB"]
     meet = await fetch_latest_meet(db)
-    return web.json_response(meet)
+    headers = meet_validators([meet])
+    if not_modified(request, headers):
+        return web.Response(status=304, headers=headers)
+    return web.json_response(meet, headers=headers)
 
 
 @router.get("/latest/meets/withintwoweeks")
 async def get_meets_within_two_weeks(request: web.Request) -> web.Response:
     db = request.config_dict["DB"]
-    datenow = datetime.datetime.now()
-    dateweekbefore = datenow - datetime.timedelta(days=3)
-    dwb = f"{dateweekbefore.year}{dateweekbefore.month:02d}{dateweekbefore.day:02d}"
-    dateweeklater = datenow + datetime.timedelta(days=14)
-    dwl = f"{dateweeklater.year}{dateweeklater.month:02d}{dateweeklater.day:02d}"
-    meets = await db.fetch(
-        f"SELECT * FROM meets where startdate BETWEEN '{dwb}' AND '{dwl}' ORDER BY startdate"
-    )
-    html = ""
-    for meet in meets:
-        times = ""
-        if meet["format"] == "pf":
-            times = f'Warmups @ {meet["pwarmups"]} (P) {meet["fwarmups"]} (F) | Meet @ {meet["pstart"]} (P) {meet["fstart"]} (F)'
-        else:
-            times = f'Warmups @ {meet["fwarmups"]} | Meet @ {meet["fstart"]}'
-        files = ""
-        if meet["infopath"]:
-            files += f'<b style="text-decoration: underline"><a href="{meet["infopath"]}">INFO</a></b><br>'
-        if meet["heatspath"]:
-            files += f'<b style="text-decoration: underline"><a href="{meet["heatspath"]}">HEATS</a></b><br>'
-        if meet["psychpath"]:
-            files += f'<b style="text-decoration: underline"><a href="{meet["psychpath"]}">PSYCH</a></b><br>'
-        if meet["sessionpath"]:
-            files += f'<b style="text-decoration: underline"><a href="{meet["sessionpath"]}">SESSIONS</a></b><br>'
-        if meet["resultspath"]:
-            files += f'<b style="text-decoration: underline"><a href="{meet["resultspath"]}">RESULTS</a></b><br>'
-        if meet["scorespath"]:
-            files += f'<b style="text-decoration: underline"><a href="{meet["scorespath"]}">SCORES</a></b><br>'
-        html += f'<tr class="meet-row"><td style="width: 85%; background-color: #{venue_colors[meet["venue"]]};" class="meet-info-col"><b>{meet["startdate"][:4]} {meet["host"]} {meet["name"]}</b><br>{venues[meet["venue"]]} ({meet["venue"]})<br>{create_date(meet["startdate"], meet["enddate"])}<br>{times}<br><b style="color: darkred">{meet["notes"]}</b></td><td style="width:15%; background-color: #{venue_colors[meet["venue"]]};" class="meet-files-col">{files[:-4]}</td></tr>'
-    return web.Response(body=html)
+    today = datetime.date.today()
+    start = today - datetime.timedelta(days=3)
+    end = today + datetime.timedelta(days=14)
+    rows = await db.fetch(
+        "SELECT id FROM meets WHERE startdate BETWEEN $1 AND $2 ORDER BY startdate",
+        start,
+        end,
+    )
+    meets = await fetch_meets(db, [row["id"] for row in rows])
+    meets = [meets[row["id"]] for row in rows if row["id"] in meets]
+    headers = meet_validators(meets, start, end)
+    if not_modified(request, headers):
+        return web.Response(status=304, headers=headers)
+    html = render_meet_rows(meets, "upcoming")
+    return web.Response(body=html, headers=headers)
 
 
 @router.get("/meets/{meet}/entries/{team}")
@@ -2219,9 +2797,8 @@ async def create_entry(request: web.Request) -> web.Response:
     event = info["event"]
     seed = info["seed"]
     time = info["time"]
-    splits = list(info["splits"])
+    splits = [float(split) for split in info["splits"]]
     id = generate_id(3)
-    splits = json.dumps(splits)
     db = request.config_dict["DB"]
     await db.execute(
         "INSERT INTO entries (id, swimmer, meet, event, seed, time, splits) VALUES($1, $2, $3, $4, $5, $6, $7)",
@@ -2241,7 +2818,7 @@ async def create_entry(request: web.Request) -> web.Response:
             "event": await fetch_event(db, event),
             "seed": seed,
             "time": time,
-            "splits": json.loads(splits),
+            "splits": splits,
         }
     )
 
@@ -2251,7 +2828,7 @@ async def create_entry(request: web.Request) -> web.Response:
 async def get_entry(request: web.Request) -> web.Response:
     entry_id = int(request.match_info["id"])
     db = request.config_dict["DB"]
-    entry = await fetch_entry(db, entry_id)
+    entry = await fetch_entry(db, entry_id, request["loaders"])
     return web.json_response(entry)
 
 
@@ -2263,7 +2840,7 @@ async def get_event_all(request: web.Request) -> web.Response:
         return a
     event_code = request.match_info["code"]
     db = request.config_dict["DB"]
-    entries = await fetch_event_all_entries(db, event_code)
+    entries = await fetch_event_all_entries(db, event_code, request["loaders"])
     return web.json_response(entries)
 
 
@@ -2279,6 +2856,19 @@ async def get_event_top5(request: web.Request) -> web.Response:
     return web.json_response(entries)
 
 
+@router.get("/events/{code}/top/{n}")
+@handle_json_error
+async def get_event_top_n(request: web.Request) -> web.Response:
+    a = await auth_required(request, permissions=1)
+    if a.status != 200:
+        return a
+    event_code = request.match_info["code"]
+    n = int(request.match_info["n"])
+    db = request.config_dict["DB"]
+    entries = await fetch_event_top_n(db, event_code, n)
+    return web.json_response(entries)
+
+
 async def fetch_top5_school(db):
     events = ["200F", "200M", "50F", "100L", "100F", "500F", "100B", "100S"]
     headers = [
@@ -2479,19 +3069,28 @@ async def fetch_top5_relays(db):
 @router.get("/records/top5/school")
 async def get_school_top5(request: web.Request) -> web.Response:
     db = request.config_dict["DB"]
-    return web.Response(body=await fetch_top5_school(db))
+    body = await response_cache.get(
+        "top5/school", RECORDS_TTL, lambda: fetch_top5_school(db)
+    )
+    return web.Response(body=body)
 
 
 @router.get("/records/top5/program")
 async def get_program_top5(request: web.Request) -> web.Response:
     db = request.config_dict["DB"]
-    return web.Response(body=await fetch_top5_program(db))
+    body = await response_cache.get(
+        "top5/program", RECORDS_TTL, lambda: fetch_top5_program(db)
+    )
+    return web.Response(body=body)
 
 
 @router.get("/records/top5/relays")
 async def get_relay_top5(request: web.Request) -> web.Response:
     db = request.config_dict["DB"]
-    return web.Response(body=await fetch_top5_program(db))
+    body = await response_cache.get(
+        "top5/relays", RECORDS_TTL, lambda: fetch_top5_relays(db)
+    )
+    return web.Response(body=body)
 
 
 @router.get("/top5/update")
@@ -2518,6 +3117,22 @@ async def update_top5(request: web.Request) -> web.Response:
     return web.Response(body="Done!")
 
 
+@router.get("/cache/stats")
+@handle_json_error
+async def get_cache_stats(request: web.Request) -> web.Response:
+    a = await auth_required(request, permissions=4)
+    if a.status != 200:
+        return a
+    return web.json_response(
+        {
+            "reference": reference_cache.stats(),
+            "meets": meet_cache.stats(),
+            "responses": response_cache.stats(),
+            "principals": principal_cache.stats(),
+        }
+    )
+
+
 # Ping
 @router.get("/ping")
 @handle_json_error
@@ -2529,6 +3144,16 @@ parser = argparse.ArgumentParser(description="SAGH API server; --path: path to u
 parser.add_argument('--path')
 args = parser.parse_args()
 
+
+async def missing_indexes(db: asyncpg.Pool) -> list:
+    expected = expected_indexes()
+    rows = await db.fetch(
+        "SELECT indexname FROM pg_indexes WHERE indexname = ANY($1::text[])", expected
+    )
+    present = {row["indexname"] for row in rows}
+    return [name for name in expected if name not in present]
+
+
 async def init_db(app: web.Application) -> AsyncIterator[None]:
     db = await asyncpg.create_pool(
         user=creds["database"]["username"],
@@ -2537,12 +3162,32 @@ async def init_db(app: web.Application) -> AsyncIterator[None]:
         host=creds["database"]["host"],
     )
     app["DB"] = db
+    missing = await missing_indexes(db)
+    if missing:
+        print(f"Missing indexes, run migrate.py: {', '.join(missing)}")
+    await reference_cache.load(db)
+    listener = await db.acquire()
+    await listener.add_listener(reference_cache.channel, reference_cache.notified)
+    recorder = asyncio.ensure_future(access_recorder.run(db))
     yield
-    await db.close()
+    # Let an in-flight flush finish (or put its ids back) before the final one.
+    recorder.cancel()
+    try:
+        await recorder
+    except asyncio.CancelledError:
+        pass
+    try:
+        await access_recorder.flush(db)
+    finally:
+        await listener.remove_listener(
+            reference_cache.channel, reference_cache.notified
+        )
+        await db.release(listener)
+        await db.close()
 
 
 async def init_app() -> web.Application:
-    app = web.Application()
+    app = web.Application(middlewares=[loaders_middleware])
     app.add_routes(router)
     # Configure default CORS settings.
     cors = aiohttp_cors.setup(
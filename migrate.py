@@ -0,0 +1,93 @@
+import argparse
+import os
+import re
+import sys
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+INDEX = re.compile(r"CREATE (?:UNIQUE )?INDEX IF NOT EXISTS (\w+)", re.IGNORECASE)
+
+
+def migrations(directory: str = MIGRATIONS) -> list:
+    """(version, name, path) of every NNNN_name.sql file in directory, in order."""
+    found = []
+    for file in sorted(os.listdir(directory)):
+        match = re.fullmatch(r"(\d+)_(\w+)\.sql", file)
+        if match:
+            found.append((int(match[1]), match[2], os.path.join(directory, file)))
+    return found
+
+
+def expected_indexes(directory: str = MIGRATIONS) -> list:
+    """Names of the indexes the migrations create."""
+    names = []
+    for version, name, path in migrations(directory):
+        with open(path, "r") as f:
+            names += INDEX.findall(f.read())
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Apply pending migrations from the migrations directory"
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="only report pending migrations and missing indexes; exit 1 if any",
+    )
+    args = parser.parse_args()
+
+    from database import connect
+
+    con = connect()
+    cur = con.cursor()
+
+    cur.execute("SELECT to_regclass('schema_migrations') IS NOT NULL")
+    if cur.fetchone()[0]:
+        cur.execute("SELECT version FROM schema_migrations")
+        applied = {row[0] for row in cur.fetchall()}
+    else:
+        applied = set()
+    pending = [migration for migration in migrations() if migration[0] not in applied]
+
+    if args.check:
+        expected = expected_indexes()
+        cur.execute(
+            "SELECT indexname FROM pg_indexes WHERE indexname = ANY(%s)", (expected,)
+        )
+        present = {row[0] for row in cur.fetchall()}
+        missing = [name for name in expected if name not in present]
+        for version, name, path in pending:
+            print(f"Pending migration {version:04d} {name}")
+        for name in missing:
+            print(f"Missing index {name}")
+        if not pending and not missing:
+            print("Schema is up to date")
+        sys.exit(1 if pending or missing else 0)
+
+    cur.execute(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, "
+        "name TEXT NOT NULL, "
+        "applied_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+    )
+    con.commit()
+    for version, name, path in pending:
+        print(f"Applying migration {version:04d} {name}")
+        with open(path, "r") as f:
+            sql = f.read()
+        try:
+            cur.execute(sql)
+            cur.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                (version, name),
+            )
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+    print(f"Applied {len(pending)} migrations")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +0,0 @@
-CREATE TABLE meets (
-    id INTEGER PRIMARY KEY,
-    designator TEXT,
-    name TEXT,
-    venue STR,
-    date INTEGER,
-)
\ No newline at end of file
@@ -0,0 +1,14 @@
+-- Indexes behind the hottest lookups in main.py.
+
+-- A swimmer's history and best time per event.
+CREATE INDEX IF NOT EXISTS entries_swimmer_event ON entries (swimmer, event);
+-- Meet results and team results, grouped by event.
+CREATE INDEX IF NOT EXISTS entries_meet_event ON entries (meet, event);
+-- Event listings and leaderboard rebuilds, which skip ignored swims.
+CREATE INDEX IF NOT EXISTS entries_event_counted ON entries (event) WHERE NOT ignored;
+-- auth_required on every authenticated request.
+CREATE INDEX IF NOT EXISTS auth_tokens_token ON auth_tokens (token);
+-- Team rosters.
+CREATE INDEX IF NOT EXISTS swimmers_team_active ON swimmers (team, active);
+-- Importers matching swimmers by USA Swimming id.
+CREATE INDEX IF NOT EXISTS swimmers_usas_id ON swimmers (usas_id);
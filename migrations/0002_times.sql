@@ -0,0 +1,18 @@
+-- Swim times as integer centiseconds alongside the "1:02.34" / "59.87" text columns.
+-- The generated columns are filled for existing rows when added and kept in sync
+-- on every insert and update. Anything that is not a time (NT, NS, DQ...) is NULL.
+
+CREATE OR REPLACE FUNCTION time_to_cs(value TEXT) RETURNS INTEGER AS $$
+    SELECT round(100 * CASE
+        WHEN value ~ '^[0-9]+:[0-9]+(\.[0-9]+)?$'
+            THEN split_part(value, ':', 1)::numeric * 60 + split_part(value, ':', 2)::numeric
+        WHEN value ~ '^[0-9]+(\.[0-9]+)?$'
+            THEN value::numeric
+    END)::integer;
+$$ LANGUAGE sql IMMUTABLE;
+
+ALTER TABLE entries ADD COLUMN IF NOT EXISTS time_cs INTEGER GENERATED ALWAYS AS (time_to_cs(time)) STORED;
+ALTER TABLE entries ADD COLUMN IF NOT EXISTS seed_cs INTEGER GENERATED ALWAYS AS (time_to_cs(seed)) STORED;
+
+-- Top-N, best-time and standard checks all rank one event's counted swims.
+CREATE INDEX IF NOT EXISTS entries_event_time_cs ON entries (event, time_cs) WHERE NOT ignored;
@@ -0,0 +1,20 @@
+-- Store entries.splits as a native array instead of JSON text, so asyncpg and
+-- psycopg2 return Python lists directly, and flag rows whose first split is 0
+-- (timing failures) so ranking queries can skip them in SQL.
+
+CREATE OR REPLACE FUNCTION splits_to_array(value TEXT) RETURNS DOUBLE PRECISION[] AS $$
+    SELECT coalesce(array_agg(split::double precision ORDER BY n), '{}')
+    FROM json_array_elements_text(coalesce(value, '[]')::json) WITH ORDINALITY AS s (split, n);
+$$ LANGUAGE sql IMMUTABLE;
+
+DO $$
+BEGIN
+    IF (SELECT data_type FROM information_schema.columns
+        WHERE table_name = 'entries' AND column_name = 'splits') <> 'ARRAY' THEN
+        ALTER TABLE entries ALTER COLUMN splits TYPE DOUBLE PRECISION[] USING splits_to_array(splits);
+    END IF;
+END;
+$$;
+
+ALTER TABLE entries ADD COLUMN IF NOT EXISTS has_valid_splits BOOLEAN
+    GENERATED ALWAYS AS (coalesce(splits[1] <> 0, true)) STORED;
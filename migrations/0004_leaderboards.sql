@@ -0,0 +1,187 @@
+-- Top five swims per event, kept up to date by triggers on entries, relays and swimmers.
+-- "official" leaves out homeschool swimmers, "program" includes everyone.
+-- Filled at the end of this migration; `python rebuild-leaderboards.py` repairs it.
+
+CREATE TABLE IF NOT EXISTS leaderboards (
+    event TEXT NOT NULL,
+    scope TEXT NOT NULL CHECK (scope IN ('official', 'program')),
+    rank INTEGER NOT NULL,
+    entry BIGINT NOT NULL,
+    time_cs INTEGER NOT NULL,
+    PRIMARY KEY (event, scope, rank)
+);
+
+CREATE INDEX IF NOT EXISTS leaderboards_entry ON leaderboards (entry);
+
+-- Recompute both boards for one event from entries. Mirrors TOP_N_QUERY in main.py:
+-- best swim per swimmer (or relay lineup), zero first splits skipped. Rebuilds of
+-- the same event are serialized, so concurrent writers never collide on the key.
+CREATE OR REPLACE FUNCTION leaderboard_rebuild(target TEXT) RETURNS VOID AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('leaderboards'), hashtext(target));
+    DELETE FROM leaderboards WHERE event = target;
+    INSERT INTO leaderboards (event, scope, rank, entry, time_cs)
+    SELECT target, scope, rank, id, time_cs FROM (
+        SELECT scopes.scope, best.id, best.time_cs,
+               row_number() OVER (PARTITION BY scopes.scope ORDER BY best.time_cs, best.id) AS rank
+        FROM (VALUES ('official', true), ('program', false)) AS scopes (scope, official)
+        CROSS JOIN LATERAL (
+            SELECT DISTINCT ON (competitor) id, time_cs FROM (
+                SELECT e.id, e.time_cs,
+                       CASE WHEN r.entry IS NULL THEN 'S' || e.swimmer
+                            ELSE concat_ws('-', 'R', r.swimmer_1, r.swimmer_2, r.swimmer_3, r.swimmer_4)
+                       END AS competitor
+                FROM entries e
+                JOIN swimmers s ON s.id = e.swimmer
+                LEFT JOIN relays r ON e.relay AND r.entry = e.id
+                WHERE e.event = target
+                  AND e.ignored = false
+                  AND NOT (scopes.official AND s.homeschool IS TRUE)
+                  AND e.has_valid_splits
+            ) candidates
+            WHERE time_cs IS NOT NULL
+            ORDER BY competitor, time_cs, id
+        ) best
+    ) ranked
+    WHERE rank <= 5;
+END;
+$$ LANGUAGE plpgsql;
+
+-- A swim could place if a board for its event has fewer than five rows, or it is at
+-- least as fast as the current 5th place.
+CREATE OR REPLACE FUNCTION leaderboard_could_place(target TEXT, swim_cs INTEGER) RETURNS BOOLEAN AS $$
+    SELECT EXISTS (
+        SELECT 1 FROM (VALUES ('official'), ('program')) AS scopes (scope)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM leaderboards l
+            WHERE l.event = target AND l.scope = scopes.scope AND l.rank = 5
+              AND l.time_cs < swim_cs
+        )
+    );
+$$ LANGUAGE sql STABLE;
+
+-- Rebuild the event of a changed entry only if it could place.
+CREATE OR REPLACE FUNCTION leaderboard_offer(target BIGINT) RETURNS BOOLEAN AS $$
+DECLARE
+    swim RECORD;
+BEGIN
+    SELECT e.event, e.time_cs
+    INTO swim
+    FROM entries e
+    WHERE e.id = target AND e.ignored = false;
+    IF swim.time_cs IS NULL THEN
+        RETURN false;
+    END IF;
+    IF leaderboard_could_place(swim.event, swim.time_cs) THEN
+        PERFORM leaderboard_rebuild(swim.event);
+        RETURN true;
+    END IF;
+    RETURN false;
+END;
+$$ LANGUAGE plpgsql;
+
+-- New entries are handled once per statement: each event whose fastest new swim
+-- could place is rebuilt once, however many rows a bulk insert adds to it. Events
+-- are rebuilt in a fixed order so concurrent inserts take their locks the same way.
+CREATE OR REPLACE FUNCTION leaderboard_entries_inserted() RETURNS TRIGGER AS $$
+DECLARE
+    code TEXT;
+BEGIN
+    FOR code IN
+        SELECT event FROM inserted
+        WHERE ignored = false AND time_cs IS NOT NULL
+        GROUP BY event
+        HAVING leaderboard_could_place(event, min(time_cs))
+        ORDER BY event
+    LOOP
+        PERFORM leaderboard_rebuild(code);
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION leaderboard_entries_changed() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        IF EXISTS (SELECT 1 FROM leaderboards WHERE entry = OLD.id) THEN
+            PERFORM leaderboard_rebuild(OLD.event);
+        END IF;
+    ELSE
+        IF OLD.event <> NEW.event OR EXISTS (SELECT 1 FROM leaderboards WHERE entry = OLD.id) THEN
+            PERFORM leaderboard_rebuild(OLD.event);
+        END IF;
+        PERFORM leaderboard_offer(NEW.id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Relay lineups are inserted after their entry, so offer the entry again once the
+-- lineup is known (it may merge with another swim by the same four swimmers).
+CREATE OR REPLACE FUNCTION leaderboard_relays_changed() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM leaderboard_rebuild(event) FROM entries WHERE id = OLD.entry;
+    ELSIF EXISTS (SELECT 1 FROM leaderboards WHERE entry = NEW.entry) THEN
+        PERFORM leaderboard_rebuild(event) FROM entries WHERE id = NEW.entry;
+    ELSE
+        PERFORM leaderboard_offer(NEW.entry);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- The official board leaves out homeschool swimmers, so rebuild every event the
+-- swimmer has entries in when that flag changes.
+CREATE OR REPLACE FUNCTION leaderboard_swimmers_changed() RETURNS TRIGGER AS $$
+DECLARE
+    code TEXT;
+BEGIN
+    IF OLD.homeschool IS DISTINCT FROM NEW.homeschool THEN
+        FOR code IN
+            SELECT DISTINCT event FROM entries WHERE swimmer = NEW.id ORDER BY event
+        LOOP
+            PERFORM leaderboard_rebuild(code);
+        END LOOP;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS leaderboard_entries_insert ON entries;
+CREATE TRIGGER leaderboard_entries_insert
+    AFTER INSERT ON entries
+    REFERENCING NEW TABLE AS inserted
+    FOR EACH STATEMENT EXECUTE FUNCTION leaderboard_entries_inserted();
+
+DROP TRIGGER IF EXISTS leaderboard_entries ON entries;
+CREATE TRIGGER leaderboard_entries
+    AFTER DELETE OR UPDATE OF event, swimmer, time, splits, ignored ON entries
+    FOR EACH ROW EXECUTE FUNCTION leaderboard_entries_changed();
+
+DROP TRIGGER IF EXISTS leaderboard_relays ON relays;
+CREATE TRIGGER leaderboard_relays
+    AFTER INSERT OR DELETE OR UPDATE ON relays
+    FOR EACH ROW EXECUTE FUNCTION leaderboard_relays_changed();
+
+DROP TRIGGER IF EXISTS leaderboard_swimmers ON swimmers;
+CREATE TRIGGER leaderboard_swimmers
+    AFTER UPDATE OF homeschool ON swimmers
+    FOR EACH ROW EXECUTE FUNCTION leaderboard_swimmers_changed();
+
+-- Full rebuild, for repairs: SELECT leaderboard_rebuild_all();
+CREATE OR REPLACE FUNCTION leaderboard_rebuild_all() RETURNS INTEGER AS $$
+DECLARE
+    code TEXT;
+    total INTEGER := 0;
+BEGIN
+    DELETE FROM leaderboards;
+    FOR code IN SELECT DISTINCT event FROM entries LOOP
+        PERFORM leaderboard_rebuild(code);
+        total := total + 1;
+    END LOOP;
+    RETURN total;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT leaderboard_rebuild_all();
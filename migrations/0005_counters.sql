@@ -0,0 +1,97 @@
+-- Per-swimmer statistics, kept up to date by triggers on entries and relays.
+-- Ignored entries (and relays whose entry is ignored) are not counted.
+-- Filled at the end of this migration; `python recompute-counters.py` repairs them.
+
+ALTER TABLE swimmers ADD COLUMN IF NOT EXISTS entry_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE swimmers ADD COLUMN IF NOT EXISTS relay_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE swimmers ADD COLUMN IF NOT EXISTS meet_count INTEGER NOT NULL DEFAULT 0;
+
+CREATE OR REPLACE FUNCTION swimmer_meet_count(target BIGINT) RETURNS VOID AS $$
+    UPDATE swimmers SET meet_count = (
+        SELECT count(DISTINCT meet) FROM entries WHERE swimmer = target AND ignored = false
+    ) WHERE id = target;
+$$ LANGUAGE sql;
+
+-- Add delta to relay_count of the four swimmers in entry's relay, if it has one.
+CREATE OR REPLACE FUNCTION swimmer_relay_count(target BIGINT, delta INTEGER) RETURNS VOID AS $$
+    UPDATE swimmers s SET relay_count = s.relay_count + delta
+    FROM relays r
+    WHERE r.entry = target AND s.id IN (r.swimmer_1, r.swimmer_2, r.swimmer_3, r.swimmer_4);
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION swimmer_counters_entries_changed() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') AND OLD.ignored = false THEN
+        UPDATE swimmers SET entry_count = entry_count - 1 WHERE id = OLD.swimmer;
+        PERFORM swimmer_relay_count(OLD.id, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.ignored = false THEN
+        UPDATE swimmers SET entry_count = entry_count + 1 WHERE id = NEW.swimmer;
+        PERFORM swimmer_relay_count(NEW.id, 1);
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        PERFORM swimmer_meet_count(OLD.swimmer);
+    END IF;
+    IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.swimmer <> OLD.swimmer) THEN
+        PERFORM swimmer_meet_count(NEW.swimmer);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION swimmer_counters_relays_changed() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE swimmers s SET relay_count = s.relay_count - 1
+        FROM entries e
+        WHERE e.id = OLD.entry AND e.ignored = false
+          AND s.id IN (OLD.swimmer_1, OLD.swimmer_2, OLD.swimmer_3, OLD.swimmer_4);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE swimmers s SET relay_count = s.relay_count + 1
+        FROM entries e
+        WHERE e.id = NEW.entry AND e.ignored = false
+          AND s.id IN (NEW.swimmer_1, NEW.swimmer_2, NEW.swimmer_3, NEW.swimmer_4);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS swimmer_counters_entries ON entries;
+CREATE TRIGGER swimmer_counters_entries
+    AFTER INSERT OR DELETE OR UPDATE OF swimmer, meet, ignored ON entries
+    FOR EACH ROW EXECUTE FUNCTION swimmer_counters_entries_changed();
+
+DROP TRIGGER IF EXISTS swimmer_counters_relays ON relays;
+CREATE TRIGGER swimmer_counters_relays
+    AFTER INSERT OR DELETE OR UPDATE ON relays
+    FOR EACH ROW EXECUTE FUNCTION swimmer_counters_relays_changed();
+
+-- Full recompute, for repairs: SELECT swimmer_counters_recompute();
+CREATE OR REPLACE FUNCTION swimmer_counters_recompute() RETURNS INTEGER AS $$
+    WITH individual AS (
+        SELECT swimmer, count(*) AS entries, count(DISTINCT meet) AS meets
+        FROM entries
+        WHERE ignored = false
+        GROUP BY swimmer
+    ), relay AS (
+        SELECT leg.swimmer, count(DISTINCT r.entry) AS relays
+        FROM relays r
+        JOIN entries e ON e.id = r.entry AND e.ignored = false
+        CROSS JOIN unnest(ARRAY[r.swimmer_1, r.swimmer_2, r.swimmer_3, r.swimmer_4]) AS leg (swimmer)
+        GROUP BY leg.swimmer
+    ), updated AS (
+        UPDATE swimmers s SET
+            entry_count = coalesce(individual.entries, 0),
+            relay_count = coalesce(relay.relays, 0),
+            meet_count = coalesce(individual.meets, 0)
+        FROM swimmers base
+        LEFT JOIN individual ON individual.swimmer = base.id
+        LEFT JOIN relay ON relay.swimmer = base.id
+        WHERE s.id = base.id
+        RETURNING s.id
+    )
+    SELECT count(*)::integer FROM updated;
+$$ LANGUAGE sql;
+
+SELECT swimmer_counters_recompute();
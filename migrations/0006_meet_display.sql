@@ -0,0 +1,62 @@
+-- Display fields stored on meets, filled in by a trigger whenever a meet is created
+-- or its name, host or dates change, so readers never format them per request.
+-- The final UPDATE backfills existing meets.
+
+ALTER TABLE meets ADD COLUMN IF NOT EXISTS officialname TEXT;
+ALTER TABLE meets ADD COLUMN IF NOT EXISTS display_date TEXT;
+
+-- "4 March 2023", "3-4 March 2023" or "28 February - 1 March 2023" from YYYYMMDD text.
+-- A missing end date gives the single-day form; an empty one gives NULL.
+CREATE OR REPLACE FUNCTION meet_display_date(startdate TEXT, enddate TEXT) RETURNS TEXT AS $$
+DECLARE
+    s DATE;
+    e DATE;
+BEGIN
+    IF startdate IS NULL OR startdate !~ '^[0-9]{8}$' THEN
+        RETURN 'Unknown';
+    END IF;
+    s := to_date(startdate, 'YYYYMMDD');
+    IF enddate IS NULL THEN
+        RETURN to_char(s, 'FMDD FMMonth YYYY');
+    END IF;
+    IF enddate = '' THEN
+        RETURN NULL;
+    END IF;
+    IF enddate !~ '^[0-9]{8}$' THEN
+        RETURN 'Unknown';
+    END IF;
+    e := to_date(enddate, 'YYYYMMDD');
+    IF extract(month FROM s) = extract(month FROM e) THEN
+        RETURN to_char(s, 'FMDD') || '-' || to_char(e, 'FMDD FMMonth') || ' ' || to_char(s, 'YYYY');
+    END IF;
+    RETURN to_char(s, 'FMDD FMMonth') || ' - ' || to_char(e, 'FMDD FMMonth') || ' ' || to_char(s, 'YYYY');
+EXCEPTION WHEN others THEN
+    RETURN 'Unknown';
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+-- The trigger and backfill are for YYYYMMDD text dates. Once 0008 has converted the
+-- columns to DATE it owns the trigger, so they are skipped.
+DO $do$
+BEGIN
+    IF (SELECT data_type FROM information_schema.columns
+        WHERE table_name = 'meets' AND column_name = 'startdate') <> 'date' THEN
+        CREATE OR REPLACE FUNCTION meet_display_fields() RETURNS TRIGGER AS $$
+        BEGIN
+            NEW.officialname := concat(left(NEW.startdate, 4), ' ', NEW.host, ' ', NEW.name);
+            NEW.display_date := meet_display_date(NEW.startdate, NEW.enddate);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        DROP TRIGGER IF EXISTS meet_display ON meets;
+        CREATE TRIGGER meet_display
+            BEFORE INSERT OR UPDATE OF name, host, startdate, enddate ON meets
+            FOR EACH ROW EXECUTE FUNCTION meet_display_fields();
+
+        UPDATE meets SET
+            officialname = concat(left(startdate, 4), ' ', host, ' ', name),
+            display_date = meet_display_date(startdate, enddate);
+    END IF;
+END;
+$do$;
@@ -0,0 +1,69 @@
+-- One row per relay leg, indexed by entry (primary key) and by swimmer, so a relay's
+-- lineup and the relays a swimmer swam are each one index lookup. The table is
+-- derived from relays by triggers (writers keep inserting into relays) and
+-- backfilled at the end of this migration.
+
+CREATE TABLE IF NOT EXISTS relay_legs (
+    entry BIGINT NOT NULL,
+    leg SMALLINT NOT NULL CHECK (leg BETWEEN 1 AND 4),
+    swimmer BIGINT NOT NULL,
+    split DOUBLE PRECISION,
+    PRIMARY KEY (entry, leg)
+);
+
+CREATE INDEX IF NOT EXISTS relay_legs_swimmer ON relay_legs (swimmer);
+
+-- Time swum on one leg, from the entry's cumulative splits. NULL unless the splits
+-- divide evenly into four legs.
+CREATE OR REPLACE FUNCTION relay_leg_split(splits DOUBLE PRECISION[], leg INTEGER) RETURNS DOUBLE PRECISION AS $$
+    SELECT CASE WHEN cardinality(splits) > 0 AND cardinality(splits) % 4 = 0 THEN
+        splits[leg * cardinality(splits) / 4] - coalesce(splits[(leg - 1) * cardinality(splits) / 4], 0)
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION relay_legs_relays_changed() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        DELETE FROM relay_legs WHERE entry = OLD.entry;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO relay_legs (entry, leg, swimmer, split)
+        SELECT NEW.entry, l.leg, l.swimmer, relay_leg_split(e.splits, l.leg::integer)
+        FROM unnest(ARRAY[NEW.swimmer_1, NEW.swimmer_2, NEW.swimmer_3, NEW.swimmer_4])
+            WITH ORDINALITY AS l (swimmer, leg)
+        LEFT JOIN entries e ON e.id = NEW.entry
+        WHERE l.swimmer IS NOT NULL;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION relay_legs_entries_changed() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM relay_legs WHERE entry = OLD.id;
+    ELSE
+        UPDATE relay_legs SET split = relay_leg_split(NEW.splits, leg) WHERE entry = NEW.id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS relay_legs_relays ON relays;
+CREATE TRIGGER relay_legs_relays
+    AFTER INSERT OR DELETE OR UPDATE ON relays
+    FOR EACH ROW EXECUTE FUNCTION relay_legs_relays_changed();
+
+DROP TRIGGER IF EXISTS relay_legs_entries ON entries;
+CREATE TRIGGER relay_legs_entries
+    AFTER DELETE OR UPDATE OF splits ON entries
+    FOR EACH ROW EXECUTE FUNCTION relay_legs_entries_changed();
+
+INSERT INTO relay_legs (entry, leg, swimmer, split)
+SELECT r.entry, l.leg, l.swimmer, relay_leg_split(e.splits, l.leg::integer)
+FROM relays r
+CROSS JOIN unnest(ARRAY[r.swimmer_1, r.swimmer_2, r.swimmer_3, r.swimmer_4])
+    WITH ORDINALITY AS l (swimmer, leg)
+LEFT JOIN entries e ON e.id = r.entry
+WHERE l.swimmer IS NOT NULL
+ON CONFLICT (entry, leg) DO NOTHING;
@@ -0,0 +1,46 @@
+-- Store meets.startdate and enddate as DATE instead of YYYYMMDD text, and index
+-- them for season and date-range lookups. The display trigger from 0006 is
+-- replaced here to work on dates. Empty or malformed dates become NULL.
+
+CREATE OR REPLACE FUNCTION meet_display_date(startdate DATE, enddate DATE) RETURNS TEXT AS $$
+    SELECT CASE
+        WHEN startdate IS NULL THEN 'Unknown'
+        WHEN enddate IS NULL THEN to_char(startdate, 'FMDD FMMonth YYYY')
+        WHEN extract(month FROM startdate) = extract(month FROM enddate)
+            THEN to_char(startdate, 'FMDD') || '-' || to_char(enddate, 'FMDD FMMonth') || ' ' || to_char(startdate, 'YYYY')
+        ELSE to_char(startdate, 'FMDD FMMonth') || ' - ' || to_char(enddate, 'FMDD FMMonth') || ' ' || to_char(startdate, 'YYYY')
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION meet_display_fields() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.officialname := concat(to_char(NEW.startdate, 'YYYY'), ' ', NEW.host, ' ', NEW.name);
+    NEW.display_date := meet_display_date(NEW.startdate, NEW.enddate);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+BEGIN
+    IF (SELECT data_type FROM information_schema.columns
+        WHERE table_name = 'meets' AND column_name = 'startdate') <> 'date' THEN
+        -- A trigger on the columns blocks changing their type.
+        DROP TRIGGER IF EXISTS meet_display ON meets;
+        ALTER TABLE meets
+            ALTER COLUMN startdate TYPE DATE USING
+                CASE WHEN startdate ~ '^[0-9]{8}$' THEN to_date(startdate, 'YYYYMMDD') END,
+            ALTER COLUMN enddate TYPE DATE USING
+                CASE WHEN enddate ~ '^[0-9]{8}$' THEN to_date(enddate, 'YYYYMMDD') END;
+    END IF;
+END;
+$$;
+
+DROP FUNCTION IF EXISTS meet_display_date(TEXT, TEXT);
+
+DROP TRIGGER IF EXISTS meet_display ON meets;
+CREATE TRIGGER meet_display
+    BEFORE INSERT OR UPDATE OF name, host, startdate, enddate ON meets
+    FOR EACH ROW EXECUTE FUNCTION meet_display_fields();
+
+CREATE INDEX IF NOT EXISTS meets_season_startdate ON meets (season, startdate);
+CREATE INDEX IF NOT EXISTS meets_startdate ON meets (startdate);
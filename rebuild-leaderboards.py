@@ -0,0 +1,4 @@
+from database import call
+
+events = call("leaderboard_rebuild_all")
+print(f"Rebuilt leaderboards for {events} events")
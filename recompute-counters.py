@@ -0,0 +1,4 @@
+from database import call
+
+swimmers = call("swimmer_counters_recompute")
+print(f"Recomputed counters for {swimmers} swimmers")
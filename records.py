@@ -1,7 +1,6 @@
 import psycopg2
 import json
 import pdfkit
-import re
 from datetime import datetime
 
 date = datetime.now()
@@ -19,14 +18,6 @@ con = psycopg2.connect(
     )
 
 
-def sortByTime(e):
-    if len(e["time"]) <= 5:
-        adjusted_t = f"0:{e['time']}"
-        return adjusted_t
-    else:
-        return e["time"]
-
-
 cur = con.cursor()
 
 cur.execute("SELECT * FROM events ORDER BY relay, stroke, distance")
@@ -41,30 +32,22 @@ for event in events:
     code = event[0]
     entries = []
     body += f"\n{event[5]} {event[1]}\n=================="
-    cur.execute(f"SELECT * FROM entries WHERE event = '{code}' AND ignored = false")
+    cur.execute(f"SELECT * FROM entries WHERE event = '{code}' AND ignored = false ORDER BY time_cs NULLS LAST, id LIMIT 1")
     swims = cur.fetchall()
     counter = 1
     for swim in swims:
         cur.execute(f"SELECT last_name, first_name, middle_name FROM swimmers WHERE id = {swim[1]}")
         swimmer = cur.fetchone()
         if swim[8]:
-            cur.execute(f"SELECT swimmer_1, swimmer_2, swimmer_3, swimmer_4 FROM relays WHERE entry = {swim[0]}")
-            relay = cur.fetchone()
-            try:
-                counter = 0
-                board_name = ""
-                while counter < 4:
-                    cur.execute(f"SELECT last_name, first_name, middle_name FROM swimmers WHERE id = {relay[counter]}")
-                    name = cur.fetchone()
-                    board_name += f"\n{counter + 1}) {name[0]}, {name[1]} {name[2]}"
-                    counter += 1
-                board_name = board_name.strip()
-            except TypeError:
+            cur.execute(f"SELECT l.leg, s.last_name, s.first_name, s.middle_name FROM relay_legs l JOIN swimmers s ON s.id = l.swimmer WHERE l.entry = {swim[0]} ORDER BY l.leg")
+            legs = cur.fetchall()
+            if len(legs) == 4:
+                board_name = "\n".join(f"{leg[0]}) {leg[1]}, {leg[2]} {leg[3]}" for leg in legs)
+            else:
                 board_name = f"{swimmer[0]}, {swimmer[1]} {swimmer[2]}"
         else:
             board_name = f"{swimmer[0]}, {swimmer[1]} {swimmer[2]}"
         entries.append({"name": board_name, "time": swim[5]})
-    entries.sort(key=sortByTime)
     try:
         body += f"\n{entries[0]['name']}\n{entries[0]['time']}"
         counter += 1
@@ -36,15 +36,15 @@ else:
 cuts = {}
 
 for standard in standards:
-    cur.execute(f"SELECT * FROM standards WHERE"
+    cur.execute(f"SELECT *, time_to_cs(min_time) FROM standards WHERE"
                 f" authority = '{standard[0]}' AND short_name = '{standard[1]}' AND year >= {int(date.year)}")
     stan = cur.fetchall()
     for st in stan:
         try:
-            cuts[st[5]][st[8]] = st[3]
+            cuts[st[5]][st[8]] = st[-1]
         except KeyError:
             cuts[str(st[5])] = {}
-            cuts[st[5]][st[8]] = st[3]
+            cuts[st[5]][st[8]] = st[-1]
 print(cuts)
 
 
@@ -58,28 +58,20 @@ def assemble_code(c, l):
     return code
 
 
-def format_time(e):
-    if len(e) <= 5:
-        adjusted_t = f"0:{e}"
-        return adjusted_t
-    else:
-        return e
-
-
-ent = cur.execute(f"SELECT * FROM entries WHERE standards is null and meet in (select id from meets where season = {SEASON})")
+ent = cur.execute(f"SELECT id, event, time_cs FROM entries WHERE standards is null and time_cs is not null and meet in (select id from meets where season = {SEASON})")
 entries = cur.fetchall()
 
 for entry in entries:
     try:
-        print(cuts[entry[3]])
+        print(cuts[entry[1]])
     except KeyError:
         continue
-    print(reversed(cuts[entry[3]]))
-    for t in cuts[entry[3]]:
-        if format_time(entry[5]) <= format_time(cuts[entry[3]][t]):
-            print(f"{format_time(entry[5])} <= {format_time(cuts[entry[3]][t])}")
+    print(reversed(cuts[entry[1]]))
+    for t in cuts[entry[1]]:
+        if cuts[entry[1]][t] is not None and entry[2] <= cuts[entry[1]][t]:
+            print(f"{entry[2]} <= {cuts[entry[1]][t]}")
             cur.execute(
-                f"UPDATE entries SET standards = '{assemble_code(t, entry[3])}' WHERE id = '{entry[0]}'"
+                f"UPDATE entries SET standards = '{assemble_code(t, entry[1])}' WHERE id = '{entry[0]}'"
             )
             con.commit()
         else:
@@ -46,10 +46,11 @@ for swimmer in swimmers:
                 best_times[entry[3]] = entry[5]
             cur.execute(f"SELECT name, startdate, host FROM meets WHERE id = {entry[2]}")
             m = cur.fetchone()
+            year = m[1].strftime("%Y") if m[1] is not None else ""
             try:
-                tiscas[name].append({"event": entry[3], "time": entry[5], "meet": m[0], "year": m[1][:-4], "host": m[2]})
+                tiscas[name].append({"event": entry[3], "time": entry[5], "meet": m[0], "year": year, "host": m[2]})
             except KeyError:
-                tiscas[name] = [{"event": entry[3], "time": entry[5], "meet": m[0], "year": m[1][:-4], "host": m[2]}]
+                tiscas[name] = [{"event": entry[3], "time": entry[5], "meet": m[0], "year": year, "host": m[2]}]
 
 myKeys = list(tiscas.keys())
 myKeys.sort()